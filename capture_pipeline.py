@@ -0,0 +1,92 @@
+import queue
+import threading
+import time
+from collections import deque
+import numpy as np
+
+
+class CapturePipeline:
+    """
+    Hands events from the input listener threads to one consumer thread.
+    - push() is all a listener callback does: stamp the event and put it on the
+      source's SimpleQueue (C implementation, put never blocks or waits on a lock
+      held by Python code).
+    - The consumer thread polls the queues every `poll_ms` milliseconds and calls
+      handlers[source](timestamp, *fields) for each event in arrival order, so all the
+      state the handlers touch is only used from that one thread.
+    - The time spent in push() (the part of the callback under our control) and the
+      delay until the handler ran are kept for the last `history` events of each source.
+    """
+
+    def __init__(self, handlers, poll_ms=2, history=10000):
+        self.handlers = handlers
+        self.poll = poll_ms / 1000
+        self.queues = {source: queue.SimpleQueue() for source in handlers}
+        self.callback_times = {source: deque(maxlen=history) for source in handlers}
+        self.lags = {source: deque(maxlen=history) for source in handlers}
+        self.processed = {source: 0 for source in handlers}
+        self.errors = 0
+        self._stop_event = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="CaptureConsumer", daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def push(self, source, *fields):
+        """Queue an event, called from the listener threads."""
+        started = time.perf_counter()
+        self.queues[source].put((time.time(),) + fields)
+        self.callback_times[source].append(time.perf_counter() - started)
+
+    def _drain(self):
+        for source, events in self.queues.items():
+            handler = self.handlers[source]
+            lags = self.lags[source]
+            while True:
+                try:
+                    event = events.get_nowait()
+                except queue.Empty:
+                    break
+                try:
+                    handler(*event)
+                except Exception as e:
+                    self.errors += 1
+                    print(f"Error in handling {source} event: {e}")
+                lags.append(time.time() - event[0])
+                self.processed[source] += 1
+
+    def _run(self):
+        while not self._stop_event.wait(self.poll):
+            self._drain()
+
+    def stop(self):
+        """Stop the consumer once every queued event has been handled."""
+        self._stop_event.set()
+        if self._thread.is_alive():
+            self._thread.join()
+        self._drain()
+
+    def backlog(self):
+        return {source: events.qsize() for source, events in self.queues.items()}
+
+    def latency_stats(self):
+        """Per source: events handled, callback time and handling delay (microseconds) over the recent events."""
+        stats = {}
+        for source in self.queues:
+            callback = np.array(self.callback_times[source]) * 1e6
+            lag = np.array(self.lags[source]) * 1e6
+            entry = {'events': self.processed[source]}
+            if len(callback):
+                entry.update({
+                    'callback_p50_us': float(np.percentile(callback, 50)),
+                    'callback_p99_us': float(np.percentile(callback, 99)),
+                    'callback_max_us': float(callback.max()),
+                })
+            if len(lag):
+                entry.update({
+                    'lag_p50_us': float(np.percentile(lag, 50)),
+                    'lag_p99_us': float(np.percentile(lag, 99)),
+                    'lag_max_us': float(lag.max()),
+                })
+            stats[source] = entry
+        return stats
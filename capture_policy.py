@@ -0,0 +1,238 @@
+import math
+from data_label import label_thresholds
+
+# Gap (seconds) between two raw mouse moves that ends a stroke, the last move before
+# a pause is always stored so resting positions and pause lengths stay exact
+STROKE_PAUSE = 0.1
+# Longest gap (seconds) between two stored moves while the pointer keeps moving. data_label
+# labels a move 'Active' when its interval is below this, so keeping every stored gap
+# below it (and raw gaps above it exact) gives the same labels as storing every move
+MAX_STORED_GAP = label_thresholds['move_active']
+# Upper bound for max_gap and stroke_pause. Up to the 'Inactive' threshold, raising them
+# (e.g. both to 1.0 with 'time' at 200 ms, about 10x fewer rows instead of 4-5x) keeps the
+# Inactive time and the total moving time exact, but stored gaps of 0.1 s or more turn
+# 'Active' moves into 'Moderately Active' ones
+MAX_RELAXED_GAP = label_thresholds['move_moderate']
+
+
+class MovePolicy:
+    """
+    Decides at capture time which mouse moves reach the EventStore.
+    The base policy stores every move, subclasses drop redundant ones through keep().
+    - `seen` counts every raw move, `kept` the stored ones and `dropped` the discarded
+      ones, seen == kept + dropped + pending() at any time.
+    - The last move before a pause of `stroke_pause` seconds and the last move of the
+      session (flush()) are always stored.
+    - A held back move is stored before the gap since the last stored move reaches
+      `max_gap` seconds, so stored gaps stay below it and raw gaps above it are kept
+      exactly: the time-weighted Active/Inactive labels match storing every move.
+      A larger max_gap (up to MAX_RELAXED_GAP) trades the Active labels for fewer rows.
+    """
+
+    def __init__(self, store, stroke_pause=STROKE_PAUSE, max_gap=MAX_STORED_GAP):
+        if max(stroke_pause, max_gap) > MAX_RELAXED_GAP:
+            raise ValueError(f"stroke_pause and max_gap must be at most {MAX_RELAXED_GAP:g} s (the 'Inactive' move threshold)")
+        self.store = store
+        self.stroke_pause = stroke_pause
+        self.max_gap = max_gap
+        self.seen = 0
+        self.kept = 0
+        self.dropped = 0
+        self._last = None  # Last raw move, (timestamp, x, y)
+        self._last_stored = True
+        self._stored_time = -math.inf  # Timestamp of the last stored move
+
+    def pending(self):
+        return 0 if self._last_stored else 1
+
+    def add(self, timestamp, x, y):
+        self.seen += 1
+        last = self._last
+        if last is not None and timestamp - last[0] >= self.stroke_pause:
+            self.end_stroke()
+        elif not self._last_stored and timestamp - self._stored_time >= self.max_gap:
+            self.end_stroke()  # This move would be too far from the last stored one
+        if not self._last_stored:
+            self.dropped += 1  # The previous move was held back and is superseded by this one
+        stored = self.keep(timestamp, x, y)
+        if stored:
+            self._store(timestamp, x, y)
+        self._last = (timestamp, x, y)
+        self._last_stored = stored
+
+    def keep(self, timestamp, x, y):
+        """Return True to store this move right away."""
+        return True
+
+    def end_stroke(self):
+        if not self._last_stored:
+            self._store(*self._last)
+            self._last_stored = True
+
+    def flush(self):
+        """Store what is still held back, call once capture has stopped."""
+        self.end_stroke()
+
+    def _store(self, timestamp, x, y):
+        self.store.append(timestamp, x=x, y=y)
+        self.kept += 1
+        self._stored_time = timestamp
+
+    def stats(self):
+        return {'seen': self.seen, 'kept': self.kept, 'dropped': self.dropped}
+
+
+class TimeDownsampler(MovePolicy):
+    """
+    Stores at most one move every `min_interval_ms` milliseconds, which must be below
+    max_gap (a longer interval would store every move anyway to keep the labels).
+    """
+
+    def __init__(self, store, min_interval_ms=50, stroke_pause=STROKE_PAUSE, max_gap=MAX_STORED_GAP):
+        super().__init__(store, stroke_pause, max_gap)
+        self.min_interval = min_interval_ms / 1000
+        if self.min_interval >= max_gap:
+            raise ValueError(f"min_interval_ms must be below max_gap ({max_gap * 1000:g} ms)")
+        self._last_kept_time = -math.inf
+
+    def keep(self, timestamp, x, y):
+        if timestamp - self._last_kept_time >= self.min_interval:
+            self._last_kept_time = timestamp
+            return True
+        return False
+
+    def _store(self, timestamp, x, y):
+        super()._store(timestamp, x, y)
+        self._last_kept_time = max(self._last_kept_time, timestamp)
+
+
+class DistanceCoalescer(MovePolicy):
+    """Stores a move only once the pointer is `min_distance_px` pixels away from the last stored move."""
+
+    def __init__(self, store, min_distance_px=5, stroke_pause=STROKE_PAUSE, max_gap=MAX_STORED_GAP):
+        super().__init__(store, stroke_pause, max_gap)
+        self.min_distance_sq = min_distance_px * min_distance_px
+        self._kept_x = self._kept_y = None
+
+    def keep(self, timestamp, x, y):
+        if self._kept_x is None:
+            return True
+        dx, dy = x - self._kept_x, y - self._kept_y
+        return dx * dx + dy * dy >= self.min_distance_sq
+
+    def _store(self, timestamp, x, y):
+        super()._store(timestamp, x, y)
+        self._kept_x, self._kept_y = x, y
+
+
+def simplify_path(xs, ys, tolerance):
+    """
+    Douglas-Peucker: indices of the points to keep so that no dropped point is more than
+    `tolerance` pixels from the polyline through the kept ones. The ends are always kept.
+    """
+    n = len(xs)
+    if n < 3:
+        return list(range(n))
+    keep = [False] * n
+    keep[0] = keep[-1] = True
+    tolerance_sq = tolerance * tolerance
+    stack = [(0, n - 1)]
+    while stack:
+        first, last = stack.pop()
+        x0, y0 = xs[first], ys[first]
+        dx, dy = xs[last] - x0, ys[last] - y0
+        length_sq = dx * dx + dy * dy
+        worst, worst_sq = None, tolerance_sq
+        for i in range(first + 1, last):
+            px, py = xs[i] - x0, ys[i] - y0
+            if length_sq:
+                # Squared distance to the segment (projection clamped to its ends)
+                t = min(1.0, max(0.0, (px * dx + py * dy) / length_sq))
+                ex, ey = px - t * dx, py - t * dy
+            else:
+                ex, ey = px, py
+            distance_sq = ex * ex + ey * ey
+            if distance_sq > worst_sq:
+                worst, worst_sq = i, distance_sq
+        if worst is not None:
+            keep[worst] = True
+            stack.append((first, worst))
+            stack.append((worst, last))
+    return [i for i in range(n) if keep[i]]
+
+
+def limit_gaps(times, kept, max_gap):
+    """
+    Add indices to the sorted `kept` so that consecutive kept points are less than `max_gap`
+    apart, or adjacent (a raw gap that long is kept as is). Greedy: always the furthest point in reach.
+    """
+    result = [kept[0]] if kept else []
+    for target in kept[1:]:
+        current = result[-1]
+        while times[target] - times[current] >= max_gap and target - current > 1:
+            reach = current + 1
+            while reach + 1 < target and times[reach + 1] - times[current] < max_gap:
+                reach += 1
+            result.append(reach)
+            current = reach
+        result.append(target)
+    return result
+
+
+class PathSimplifier(MovePolicy):
+    """
+    Douglas-Peucker simplification of each stroke with a `tolerance_px` pixel tolerance.
+    Moves are held back until the stroke ends (a pause) or `max_points` have been
+    collected, then only the points that shape the path are stored, plus the ones
+    needed to keep every stored gap below max_gap.
+    """
+
+    def __init__(self, store, tolerance_px=2, max_points=512, stroke_pause=STROKE_PAUSE, max_gap=MAX_STORED_GAP):
+        super().__init__(store, stroke_pause, max_gap)
+        self.tolerance = tolerance_px
+        self.max_points = max_points
+        self._stroke = []  # Held back moves of the current stroke
+
+    def pending(self):
+        return len(self._stroke)
+
+    def add(self, timestamp, x, y):
+        self.seen += 1
+        if self._stroke and timestamp - self._stroke[-1][0] >= self.stroke_pause:
+            self.end_stroke()
+        self._stroke.append((timestamp, x, y))
+        if len(self._stroke) >= self.max_points:
+            self._simplify(final=False)
+
+    def end_stroke(self):
+        if self._stroke:
+            self._simplify(final=True)
+
+    def _simplify(self, final):
+        stroke = self._stroke
+        kept = simplify_path([point[1] for point in stroke], [point[2] for point in stroke], self.tolerance)
+        kept = limit_gaps([point[0] for point in stroke], kept, self.max_gap)
+        if not final:
+            kept.pop()  # The last point starts the rest of the stroke and is stored with it
+        for i in kept:
+            self._store(*stroke[i])
+        decided = len(stroke) if final else len(stroke) - 1
+        self.dropped += decided - len(kept)
+        self._stroke = [] if final else [stroke[-1]]
+
+
+# Policies selectable by name in data_collection.py
+MOVE_POLICIES = {
+    'all': MovePolicy,
+    'time': TimeDownsampler,
+    'distance': DistanceCoalescer,
+    'simplify': PathSimplifier,
+}
+
+
+def make_move_policy(name, store, **options):
+    try:
+        policy = MOVE_POLICIES[name]
+    except KeyError:
+        raise ValueError(f"Unknown mouse move policy: {name}") from None
+    return policy(store, **options)
@@ -0,0 +1,199 @@
+import codecs
+import os
+import queue
+import subprocess
+import sys
+import threading
+import time
+from collections import namedtuple
+
+# Runs inside each worker: waits for the code on stdin, then executes it like `python -c`
+WORKER_SOURCE = r'''
+import os
+import sys
+code = sys.stdin.buffer.read().decode("utf-8")
+limit = int(sys.argv[1])
+if limit:
+    try:
+        import resource
+        resource.setrlimit(resource.RLIMIT_AS, (limit, limit))
+    except (ImportError, ValueError, OSError):
+        pass  # No memory limit on this platform
+sys.stdin = open(os.devnull)
+sys.argv = ["-c"]
+namespace = {"__name__": "__main__", "__builtins__": __builtins__}
+try:
+    exec(compile(code, "<string>", "exec"), namespace)
+except SystemExit:
+    raise
+except BaseException:
+    import traceback
+    etype, value, tb = sys.exc_info()
+    traceback.print_exception(etype, value, tb.tb_next)  # Hide this wrapper's frame
+    sys.exit(1)
+'''
+
+RunResult = namedtuple("RunResult", ["stdout", "stderr", "returncode", "timed_out", "duration"])
+
+
+class Run:
+    """
+    One execution of a piece of code in a worker process.
+    Output arrives on `events` as ("stdout" | "stderr", text) items while the code runs,
+    followed by a single ("done", RunResult) item.
+    """
+
+    def __init__(self, process, code, timeout, max_output_bytes):
+        self.process = process
+        self.timeout = timeout
+        self.max_output_bytes = max_output_bytes
+        self.events = queue.Queue()
+        self.result = None
+        self.timed_out = False
+        self._output = {"stdout": [], "stderr": []}
+        self._output_size = 0  # Bytes kept from stdout and stderr together
+        self._output_lock = threading.Lock()
+        self.truncated = False
+        self._started = time.perf_counter()
+
+        readers = [
+            threading.Thread(target=self._read, args=(process.stdout, "stdout"), daemon=True),
+            threading.Thread(target=self._read, args=(process.stderr, "stderr"), daemon=True),
+        ]
+        for reader in readers:
+            reader.start()
+        threading.Thread(target=self._watch, args=(readers,), daemon=True).start()
+
+        try:
+            process.stdin.write(code.encode("utf-8"))
+            process.stdin.close()
+        except OSError:
+            pass  # Worker already gone, reported through its exit code
+
+    def _read(self, pipe, name):
+        decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+        full = False
+        while True:
+            chunk = os.read(pipe.fileno(), 4096)
+            if not chunk:
+                # End of output, a partial character left at the cap is dropped rather than replaced
+                text = "" if full else decoder.decode(b"", final=True)
+                if text:
+                    self._output[name].append(text)
+                    self.events.put((name, text))
+                break
+            if full:
+                continue  # Keep draining the pipe so the process isn't blocked writing to it
+            with self._output_lock:
+                room = self.max_output_bytes - self._output_size
+                if len(chunk) > room:
+                    # Cut at the limit, on a character boundary so no partial character is decoded
+                    cut = max(room, 0)
+                    while cut > 0 and chunk[cut] & 0xC0 == 0x80:
+                        cut -= 1
+                    chunk, full = chunk[:cut], True
+                    self.truncated = True
+                self._output_size += len(chunk)
+            text = decoder.decode(chunk)
+            if text:
+                self._output[name].append(text)
+                self.events.put((name, text))
+        pipe.close()
+
+    def _watch(self, readers):
+        try:
+            self.process.wait(self.timeout)
+        except subprocess.TimeoutExpired:
+            self.timed_out = True
+            self.process.kill()
+            self.process.wait()
+        for reader in readers:
+            reader.join()
+
+        if self.truncated:
+            self.events.put(("stderr", "\n[Output truncated]\n"))
+        self.result = RunResult(
+            "".join(self._output["stdout"]),
+            "".join(self._output["stderr"]),
+            self.process.returncode,
+            self.timed_out,
+            time.perf_counter() - self._started,
+        )
+        self.events.put(("done", self.result))
+
+    @property
+    def done(self):
+        return self.result is not None
+
+    def cancel(self):
+        if self.process.poll() is None:
+            self.process.kill()
+
+    def wait(self):
+        """Block until the run is finished and return its RunResult."""
+        self.process.wait()
+        while self.result is None:
+            time.sleep(0.005)
+        return self.result
+
+
+class CodeRunner:
+    """
+    Executes code in a small pool of pre-started Python worker processes.
+    - Workers are spawned ahead of time, so a run doesn't wait for interpreter startup.
+    - Each worker runs one submission and exits, the pool is refilled right away.
+    - Every run has a wall-clock `timeout` (seconds) and an address-space limit of
+      `memory_limit_mb` (POSIX only, ignored where the resource module is missing).
+    """
+
+    def __init__(self, pool_size=2, timeout=10, memory_limit_mb=512, max_output_bytes=1_000_000, python=None):
+        self.pool_size = pool_size
+        self.timeout = timeout
+        self.memory_limit = memory_limit_mb * 1024 * 1024 if memory_limit_mb else 0
+        self.max_output_bytes = max_output_bytes
+        self.python = python or sys.executable
+        self._idle = []
+        self._lock = threading.Lock()
+        self._fill_pool()
+
+    def _spawn(self):
+        creationflags = getattr(subprocess, "CREATE_NO_WINDOW", 0)  # No console window per worker on Windows
+        return subprocess.Popen(
+            [self.python, "-u", "-c", WORKER_SOURCE, str(self.memory_limit)],
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            creationflags=creationflags,
+        )
+
+    def _fill_pool(self):
+        with self._lock:
+            self._idle = [process for process in self._idle if process.poll() is None]
+            while len(self._idle) < self.pool_size:
+                self._idle.append(self._spawn())
+
+    def _take_worker(self):
+        with self._lock:
+            while self._idle:
+                process = self._idle.pop(0)
+                if process.poll() is None:
+                    break
+            else:
+                process = self._spawn()
+        self._fill_pool()
+        return process
+
+    def start(self, code, timeout=None):
+        """Start running `code` and return its Run without waiting for it."""
+        return Run(self._take_worker(), code, timeout or self.timeout, self.max_output_bytes)
+
+    def run(self, code, timeout=None):
+        """Run `code` and wait for its RunResult."""
+        return self.start(code, timeout).wait()
+
+    def shutdown(self):
+        with self._lock:
+            for process in self._idle:
+                process.kill()
+                process.wait()
+            self._idle = []
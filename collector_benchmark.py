@@ -0,0 +1,95 @@
+import argparse
+import os
+import shutil
+import tempfile
+import time
+import tracemalloc
+import numpy as np
+from data_collection import Collector
+from replay_source import ReplaySource
+
+# Storage backends to compare: Collector settings for each
+BACKENDS = {
+    'csv': {'stream_to_disk': False, 'output_format': 'csv'},
+    'parquet': {'stream_to_disk': False, 'output_format': 'parquet'},
+    'csv-stream': {'stream_to_disk': True, 'output_format': 'csv'},
+    'parquet-stream': {'stream_to_disk': True, 'output_format': 'parquet'},
+    'ring-csv': {'stream_to_disk': False, 'output_format': 'csv', 'buffer_capacity': 4096},
+}
+
+
+def directory_size(path):
+    if os.path.isfile(path):
+        return os.path.getsize(path)
+    return sum(os.path.getsize(os.path.join(root, name)) for root, _, names in os.walk(path) for name in names)
+
+
+def run_capture(backend, rate, seconds, seed=0, trace_memory=False):
+    """One capture session of `seconds` at `rate` events/s from a synthetic ReplaySource."""
+    work_dir = tempfile.mkdtemp(prefix="collector-bench-")
+    settings = dict(BACKENDS[backend])
+    output_path = os.path.join(work_dir, f"session.{settings['output_format']}")
+    source = ReplaySource.synthetic(int(rate * seconds), rate, seed)
+    collector = Collector(source, session_directory=os.path.join(work_dir, "session"), output_path=output_path,
+                          move_policy='all', move_policy_options={}, publish_metrics=False, **settings)
+    try:
+        if trace_memory:
+            tracemalloc.start()
+        collector.start()
+        source.wait()
+        save_started = time.perf_counter()
+        saved_to = collector.stop()
+        save_seconds = time.perf_counter() - save_started
+        peak_memory = tracemalloc.get_traced_memory()[1] if trace_memory else None
+    finally:
+        if trace_memory:
+            tracemalloc.stop()
+
+    callbacks = np.concatenate([np.array(times) for times in collector.capture.callback_times.values()]) * 1e6
+    lags = np.concatenate([np.array(lags) for lags in collector.capture.lags.values()]) * 1e3
+    stores = (collector.keystrokes, collector.mouse_moves, collector.mouse_clicks)
+    writer = collector.session_writer
+    rows = writer.rows_written if writer else sum(len(store) for store in stores)
+    write_seconds = writer.write_seconds if writer else save_seconds
+    result = {
+        'events': source.sent,
+        'rate': source.sent / source.elapsed if source.elapsed else 0,
+        'behind_ms': source.max_behind * 1000,
+        'callback_p50_us': float(np.percentile(callbacks, 50)),
+        'callback_p99_us': float(np.percentile(callbacks, 99)),
+        'lag_p99_ms': float(np.percentile(lags, 99)),
+        'dropped': sum(store.dropped for store in stores) + collector.move_filter.dropped,
+        'rows': rows,
+        'write_rows_per_s': rows / write_seconds if write_seconds else 0,
+        'bytes': directory_size(saved_to),
+        'peak_memory': peak_memory,
+    }
+    shutil.rmtree(work_dir, ignore_errors=True)
+    return result
+
+
+def benchmark(backends, rates, seconds):
+    print(f"{'backend':<15} {'rate':>6} {'sent/s':>8} {'behind':>8} {'cb p50':>8} {'cb p99':>8} {'lag p99':>8} "
+          f"{'dropped':>8} {'write rows/s':>13} {'MB out':>7} {'peak MB':>8}")
+    for backend in backends:
+        for rate in rates:
+            try:
+                result = run_capture(backend, rate, seconds)
+                # Memory on a second, identical run: tracing allocations slows the capture down
+                result['peak_memory'] = run_capture(backend, rate, seconds, trace_memory=True)['peak_memory']
+            except ImportError as e:
+                print(f"{backend:<15} skipped: {e}")
+                break
+            print(f"{backend:<15} {rate:>6} {result['rate']:>8.0f} {result['behind_ms']:>6.1f}ms "
+                  f"{result['callback_p50_us']:>6.1f}us {result['callback_p99_us']:>6.1f}us {result['lag_p99_ms']:>6.1f}ms "
+                  f"{result['dropped']:>8} {result['write_rows_per_s']:>13.0f} {result['bytes'] / 1e6:>7.2f} "
+                  f"{result['peak_memory'] / 1e6:>8.1f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Replay synthetic input through the collector and time each storage backend.")
+    parser.add_argument("--backends", nargs="+", default=list(BACKENDS), choices=list(BACKENDS))
+    parser.add_argument("--rates", nargs="+", type=int, default=[1000, 10000], help="Events per second")
+    parser.add_argument("--seconds", type=float, default=3, help="Length of each capture")
+    args = parser.parse_args()
+    benchmark(args.backends, args.rates, args.seconds)
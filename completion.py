@@ -0,0 +1,72 @@
+import builtins
+import heapq
+import keyword
+import re
+from bisect import bisect_left, insort
+from collections import Counter
+
+IDENTIFIER = re.compile(r"[A-Za-z_][A-Za-z0-9_]*")
+
+
+class CompletionIndex:
+    """
+    Prefix index of Python keywords, builtins and the identifiers in the editor buffer.
+    - Words are kept in a sorted list, a prefix lookup is a bisect plus a scan over the matches.
+    - Matches are ranked by how often the word occurs in the buffer.
+    - update_lines() diffs the buffer against the previous call and only re-scans
+      the lines that changed.
+    """
+
+    def __init__(self, base_words=None):
+        if base_words is None:
+            base_words = keyword.kwlist + [name for name in dir(builtins) if not name.startswith("_")]
+        self.base_words = set(base_words)
+        self.counts = Counter()  # Occurrences of each word in the buffer
+        self.words = sorted(self.base_words)
+        self.lines = []
+        self.line_words = []  # Counter of identifiers per line
+
+    def add(self, words):
+        for word, count in words.items():
+            if word not in self.counts and word not in self.base_words:
+                insort(self.words, word)
+            self.counts[word] += count
+
+    def remove(self, words):
+        for word, count in words.items():
+            self.counts[word] -= count
+            if self.counts[word] <= 0:
+                del self.counts[word]
+                if word not in self.base_words:
+                    del self.words[bisect_left(self.words, word)]
+
+    def update_lines(self, lines):
+        """Bring the index in line with the buffer `lines`, re-scanning only the changed lines."""
+        old = self.lines
+        limit = min(len(old), len(lines))
+        first_changed = 0
+        while first_changed < limit and old[first_changed] == lines[first_changed]:
+            first_changed += 1
+        if first_changed == len(old) == len(lines):
+            return
+        same_tail = 0
+        while same_tail < limit - first_changed and old[-1 - same_tail] == lines[-1 - same_tail]:
+            same_tail += 1
+
+        removed = self.line_words[first_changed:len(old) - same_tail]
+        added = [Counter(IDENTIFIER.findall(line)) for line in lines[first_changed:len(lines) - same_tail]]
+        for words in removed:
+            self.remove(words)
+        for words in added:
+            self.add(words)
+        self.line_words[first_changed:len(old) - same_tail] = added
+        self.lines = list(lines)
+
+    def complete(self, prefix, k=10):
+        """Return up to `k` words starting with `prefix`, most frequent first."""
+        words = self.words
+        start = bisect_left(words, prefix)
+        end = bisect_left(words, prefix + "\U0010ffff", start)
+        counts = self.counts
+        matches = (word for word in words[start:end] if word != prefix)
+        return heapq.nsmallest(k, matches, key=lambda word: (-counts[word], len(word), word))
@@ -1,144 +1,256 @@
-from pynput.mouse import Listener as MouseListener
-from pynput.keyboard import Listener as KeyboardListener, Key
 import time
-import pandas as pd
 import csv
 from collections import defaultdict
+from event_store import EventStore, SymbolTable, events_to_dataframe
+from session_writer import SessionWriter
+from session_format import write_session
+from capture_policy import make_move_policy
+from capture_pipeline import CapturePipeline
+from key_names import KeyNormalizer
+from live_metrics import MetricsEngine, format_snapshot
+from metrics_server import MetricsPublisher
 
 # Local variables
 duration_in_seconds = 3
+buffer_capacity = None  # Keep only the newest N events per source (ring buffer), None = grow in chunks
+stream_to_disk = True  # Write events to rotating segments while capturing instead of one CSV at the end
+session_directory = 'user_activity_log'  # Segments and summary.csv go here when streaming
+output_format = 'csv'  # 'csv' or 'parquet' (compact typed binary format, needs pyarrow, streamed segments rotate every 10 s)
+# Which mouse moves are stored: 'all', 'time' (one per min_interval_ms), 'distance' (once the pointer
+# moved min_distance_px) or 'simplify' (Douglas-Peucker within tolerance_px), see capture_policy.py.
+# Every policy keeps the gaps data_label needs, so the time-weighted Active/Inactive labels are unchanged
+# (4-5x fewer rows at most). For about 10x, also pass 'max_gap' and 'stroke_pause' up to 1.0 s, e.g.
+# {'min_interval_ms': 200, 'max_gap': 1.0, 'stroke_pause': 1.0}: Inactive and total moving time stay exact,
+# but 'Active' moves are mostly labeled 'Moderately Active' and path length drops by about 6%
+move_policy = 'all'
+move_policy_options = {}  # e.g. {'min_interval_ms': 50} (must be below max_gap), {'min_distance_px': 20} or {'tolerance_px': 3}
+publish_metrics = False  # Stream live metrics to the dashboard (index.html) over http://127.0.0.1:metrics_port/events
+metrics_port = 8765  # When changed, open the dashboard as index.html?collector_port=<port>
+
+
+class PynputSource:
+    """Real keyboard and mouse input, through pynput listeners."""
+
+    def start(self, on_press, on_move, on_click):
+        # Imported here so the collector can be used headless with another source
+        from pynput.mouse import Listener as MouseListener
+        from pynput.keyboard import Listener as KeyboardListener
+
+        # Setup the listeners for mouse and keyboard
+        self.mouse_listener = MouseListener(on_move=on_move, on_click=on_click)
+        self.keyboard_listener = KeyboardListener(on_press=on_press)
+        self.mouse_listener.start()
+        self.keyboard_listener.start()
+
+    def stop(self):
+        self.mouse_listener.stop()
+        self.keyboard_listener.stop()
+
+
+class Collector:
+    """
+    Captures keyboard and mouse events from an event source until stop() is called.
+    - The source gets the on_press/on_move/on_click callbacks in start() and calls them
+      like pynput listeners do (PynputSource by default, see replay_source.py for a
+      synthetic or recorded stream).
+    - Settings default to the module variables above.
+    - stop() stops the source, handles the queued events and saves the session,
+      it returns the path of what was written.
+    """
+
+    def __init__(self, source=None, buffer_capacity=buffer_capacity, stream_to_disk=stream_to_disk,
+                 session_directory=session_directory, output_format=output_format, output_path=None,
+                 move_policy=move_policy, move_policy_options=move_policy_options, publish_metrics=publish_metrics,
+                 metrics_port=metrics_port):
+        self.source = source or PynputSource()
+        self.stream_to_disk = stream_to_disk
+        self.session_directory = session_directory
+        self.output_format = output_format
+        self.output_path = output_path or f"user_activity_log.{output_format}"
+        self.move_policy = move_policy
+
+        # Data storage (columnar stores, key and button names share one symbol table)
+        self.symbols = SymbolTable()
+        self.keystrokes = EventStore('keystroke', capacity=buffer_capacity, symbols=self.symbols)
+        self.mouse_moves = EventStore('mouse_move', capacity=buffer_capacity, symbols=self.symbols)
+        self.mouse_clicks = EventStore('mouse_click', capacity=buffer_capacity, symbols=self.symbols)
+        self.move_filter = make_move_policy(move_policy, self.mouse_moves, **move_policy_options)
+        self.key_count = defaultdict(int)  # To count key presses
+
+        # Key names and codes, resolved once per distinct key (see key_names.py)
+        self.key_names = KeyNormalizer(self.symbols)
+
+        # Live metrics over the last 10s, 60s and the whole session, read with live_metrics.snapshot()
+        self.live_metrics = MetricsEngine()
+
+        # All processing happens on one consumer thread, the callbacks only queue the raw event
+        self.capture = CapturePipeline({
+            'keystroke': self.handle_keystroke,
+            'mouse_move': self.handle_move,
+            'mouse_click': self.handle_click,
+        })
+
+        # Drain captured events to disk in the background
+        self.session_writer = SessionWriter(
+            [self.keystrokes, self.mouse_moves, self.mouse_clicks], session_directory, segment_format=output_format
+        ) if stream_to_disk else None
+
+        # Serve the live metrics to dashboards, pushes run on their own threads
+        self.metrics_publisher = MetricsPublisher(self.live_metrics, port=metrics_port) if publish_metrics else None
+
+        self.started = self.stopped = None
+        self.summary_path = None
+        self.last_keypress_time = self.last_click_time = time.time()
+
+    # Keyboard event handler (runs on the capture thread)
+    def handle_keystroke(self, timestamp, key):
+        # Get the key's name and symbol code from the cache
+        key_name, key_code = self.key_names.resolve(key)
 
-# Data storage lists
-keystrokes = []
-mouse_moves = []
-mouse_clicks = []
-key_press_times = []  # To track time between consecutive key presses
-key_count = defaultdict(int)  # To count key presses
-last_keypress_time = time.time()
-
-# Mouse metrics
-mouse_click_times = []  # To track time between clicks
-last_click_time = time.time()
-
-# Special key mappings for control characters
-special_key_map = {
-    '\\x01': 'ctrl-A', '\\x02': 'ctrl-B', '\\x03': 'ctrl-C', '\\x04': 'ctrl-D',
-    '\\x05': 'ctrl-E', '\\x06': 'ctrl-F', '\\x07': 'ctrl-G', '\\x08': 'ctrl-H',
-    '\\x09': 'ctrl-I', '\\x0a': 'ctrl-J', '\\x0b': 'ctrl-K', '\\x0c': 'ctrl-L',
-    '\\x0d': 'ctrl-M', '\\x0e': 'ctrl-N', '\\x0f': 'ctrl-O', '\\x10': 'ctrl-P',
-    '\\x11': 'ctrl-Q', '\\x12': 'ctrl-R', '\\x13': 'ctrl-S', '\\x14': 'ctrl-T',
-    '\\x15': 'ctrl-U', '\\x16': 'ctrl-V', '\\x17': 'ctrl-W', '\\x18': 'ctrl-X',
-    '\\x19': 'ctrl-Y', '\\x1a': 'ctrl-Z', '\\x1b': 'ctrl-[', '\\x1c': 'ctrl-\\',
-    '\\x1d': 'ctrl-]', '\\x1e': 'ctrl-^', '\\x1f': 'ctrl-_' ,
-
-    'Key.space': 'SPACE',
-    'Key.backspace': 'BACKSPACE',
-    'Key.right': 'RIGHT_ARROW',
-    'Key.left': 'LEFT_ARROW',
-    'Key.up': 'UP_ARROW',
-    'Key.down': 'DOWN_ARROW',
-    'Key.esc': 'ESC',
-    'Key.enter': 'ENTER'
-}
-
-# Helper function to map keys to human-readable format
-def get_key_name(key):
-    key = str(key)
-    key = key.replace("'", '')
-    if isinstance(key, Key):
-        return special_key_map.get(str(key), str(key))  # Return mapped special key or its name
-    else:
-        return special_key_map.get(key, key)  # For regular keys like 'a', 'b', etc.
-
-# Helper function to log events with timestamps
-def log_event(event_type, data):
-    timestamp = time.time()
-    return {'timestamp': timestamp, 'event_type': event_type, **data}
-
-# Keyboard event handlers
-def on_press(key):
-    global last_keypress_time
-    try:
-        # Get key name using the mapping function
-        key_name = get_key_name(key)
-        
         # Count the key press
-        key_count[key_name] += 1
-        
+        self.key_count[key_name] += 1
+
         # Track time between key presses
-        current_time = time.time()
-        inter_keystroke_interval = current_time - last_keypress_time
-        keystrokes.append(log_event('keystroke', {'key': key_name, 'interval': inter_keystroke_interval}))
-        key_press_times.append(current_time - last_keypress_time)  # Time between key presses
-        last_keypress_time = current_time
-
-    except Exception as e:
-        print(f"Error in logging key press: {e}")
-
-# Mouse event handlers
-def on_move(x, y):
-    mouse_moves.append(log_event('mouse_move', {'x': x, 'y': y}))
-
-def on_click(x, y, button, pressed):
-    global last_click_time
-    if pressed:
-        current_time = time.time()
-        click_interval = current_time - last_click_time
-        mouse_clicks.append(log_event('mouse_click', {'x': x, 'y': y, 'button': str(button), 'interval': click_interval}))
-        mouse_click_times.append(click_interval)  # Time between clicks
-        last_click_time = current_time
-
-# Data storage function (save data to CSV with calculated metrics at the top)
-def save_data_to_csv():
-    # Calculate metrics
-    total_keystrokes = len(keystrokes)
-    typing_speed_kpm = (total_keystrokes / duration_in_seconds) * 60  # 20 seconds -> converted to KPM
-    typing_speed_wpm = typing_speed_kpm / 5  # Assuming average word length is 5 characters
-    avg_inter_key_interval = sum(key_press_times) / len(key_press_times) if key_press_times else 0
-    avg_click_interval = sum(mouse_click_times) / len(mouse_click_times) if mouse_click_times else 0
-
-    # Create a dictionary of metrics
-    metrics = {
-        'Total Keystrokes': total_keystrokes,
-        'Typing Speed (KPM)': typing_speed_kpm,
-        'Typing Speed (WPM)': typing_speed_wpm,
-        'Avg. Keypress Interval': avg_inter_key_interval,
-        'Avg. Mouse Click Interval': avg_click_interval,
-        'Most Pressed Keys': dict(key_count)
-    }
-
-    # Create the CSV header with metrics
-    header = ['Metric', 'Value']
-    metric_rows = [[key, value] for key, value in metrics.items()]
-
-    # All event data
-    all_data = keystrokes + mouse_moves + mouse_clicks
-    df_events = pd.DataFrame(all_data)
-
-    # Save metrics and events to CSV
-    with open('user_activity_log.csv', mode='w', newline='') as f:
-        writer = csv.writer(f)
-        writer.writerows([header])  # Write header for metrics
-        writer.writerows(metric_rows)  # Write metric values
-        f.write('\n')  # Add a blank line between metrics and event data
-        df_events.to_csv(f, index=False)  # Write event data
-
-# Setup the listeners for mouse and keyboard
-mouse_listener = MouseListener(on_move=on_move, on_click=on_click)
-keyboard_listener = KeyboardListener(on_press=on_press)
-
-# Start listening
-mouse_listener.start()
-keyboard_listener.start()
-
-# Run for a set period of time (e.g., 20 seconds for testing purposes)
-time.sleep(duration_in_seconds)  # 20 seconds for testing purposes
-
-# Stop the listeners
-mouse_listener.stop()
-keyboard_listener.stop()
-
-# Save collected data to CSV file with metrics at the top
-save_data_to_csv()
-
-print("Data collection completed and saved to 'user_activity_log.csv'")
\ No newline at end of file
+        inter_keystroke_interval = timestamp - self.last_keypress_time
+        self.keystrokes.append(timestamp, key_code=key_code, interval=inter_keystroke_interval)
+        self.live_metrics.keystroke(timestamp, inter_keystroke_interval)
+        self.last_keypress_time = timestamp
+
+    # Mouse event handlers (run on the capture thread)
+    def handle_move(self, timestamp, x, y):
+        self.live_metrics.activity(timestamp)
+        self.move_filter.add(timestamp, x, y)
+
+    def handle_click(self, timestamp, x, y, button):
+        click_interval = timestamp - self.last_click_time
+        self.mouse_clicks.append(timestamp, x=x, y=y, button=str(button), interval=click_interval)
+        self.live_metrics.click(timestamp, click_interval)
+        self.last_click_time = timestamp
+
+    # Source callbacks
+    def on_press(self, key):
+        self.capture.push('keystroke', key)
+
+    def on_move(self, x, y):
+        self.capture.push('mouse_move', x, y)
+
+    def on_click(self, x, y, button, pressed):
+        if pressed:
+            self.capture.push('mouse_click', x, y, button)
+
+    def start(self):
+        self.started = time.time()
+        self.last_keypress_time = self.last_click_time = self.started
+        self.live_metrics.start = self.live_metrics.last_activity = self.started
+        if self.session_writer:
+            self.session_writer.start()
+        if self.metrics_publisher:
+            self.metrics_publisher.start()
+
+        # Start listening
+        self.capture.start()
+        self.source.start(self.on_press, self.on_move, self.on_click)
+
+    def stop(self):
+        # Stop the source
+        self.source.stop()
+        self.stopped = time.time()
+        self.capture.stop()  # Handle the events still queued
+        self.move_filter.flush()  # Store the moves the policy was still holding back
+        if self.metrics_publisher:
+            self.metrics_publisher.stop()  # Sends a last update before the dashboards are disconnected
+
+        if self.session_writer:
+            # Flush the remaining events first, the metrics are read from the writer's totals
+            self.session_writer.stop()
+            self.summary_path = self.session_writer.finalize(self.calculate_metrics(
+                self.session_writer.event_counts['keystroke'],
+                self.session_writer.mean_interval('keystroke'),
+                self.session_writer.mean_interval('mouse_click'),
+            ))
+            return self.session_directory
+        if self.output_format == 'parquet':
+            self.save_data_to_parquet()
+        else:
+            # Save collected data to CSV file with metrics at the top
+            self.save_data_to_csv()
+        return self.output_path
+
+    def duration(self):
+        end = self.stopped if self.stopped is not None else time.time()
+        return end - self.started if self.started is not None else 0.0
+
+    # Session metrics from the keystroke count and the average intervals
+    def calculate_metrics(self, total_keystrokes, avg_inter_key_interval, avg_click_interval):
+        duration = self.duration() or duration_in_seconds
+        typing_speed_kpm = (total_keystrokes / duration) * 60  # Keystrokes per second -> converted to KPM
+        typing_speed_wpm = typing_speed_kpm / 5  # Assuming average word length is 5 characters
+
+        return {
+            'Total Keystrokes': total_keystrokes,
+            'Typing Speed (KPM)': typing_speed_kpm,
+            'Typing Speed (WPM)': typing_speed_wpm,
+            'Avg. Keypress Interval': avg_inter_key_interval,
+            'Avg. Mouse Click Interval': avg_click_interval,
+            'Most Pressed Keys': dict(self.key_count)
+        }
+
+    # Session metrics from the events still held in memory
+    def metrics_from_stores(self):
+        keystrokes, mouse_clicks = self.keystrokes, self.mouse_clicks
+        avg_inter_key_interval = float(keystrokes.to_arrays()['interval'].mean()) if len(keystrokes) else 0
+        avg_click_interval = float(mouse_clicks.to_arrays()['interval'].mean()) if len(mouse_clicks) else 0
+        return self.calculate_metrics(len(keystrokes), avg_inter_key_interval, avg_click_interval)
+
+    # Data storage function (save data to CSV with calculated metrics at the top)
+    def save_data_to_csv(self):
+        # Calculate metrics
+        metrics = self.metrics_from_stores()
+
+        # Create the CSV header with metrics
+        header = ['Metric', 'Value']
+        metric_rows = [[key, value] for key, value in metrics.items()]
+
+        # All event data
+        df_events = events_to_dataframe(self.keystrokes, self.mouse_moves, self.mouse_clicks)
+
+        # Save metrics and events to CSV
+        with open(self.output_path, mode='w', newline='') as f:
+            writer = csv.writer(f)
+            writer.writerows([header])  # Write header for metrics
+            writer.writerows(metric_rows)  # Write metric values
+            f.write('\n')  # Add a blank line between metrics and event data
+            df_events.to_csv(f, index=False)  # Write event data
+
+    # Save data to a Parquet session file with the metrics in the file metadata
+    def save_data_to_parquet(self):
+        df_events = events_to_dataframe(self.keystrokes, self.mouse_moves, self.mouse_clicks)
+        write_session(self.output_path, df_events, self.metrics_from_stores())
+
+    def print_report(self):
+        print(format_snapshot(self.live_metrics.snapshot(self.stopped)))
+        move_stats = self.move_filter.stats()
+        print(f"Mouse moves: {move_stats['seen']} captured, {move_stats['kept']} stored, "
+              f"{move_stats['dropped']} dropped by the '{self.move_policy}' policy")
+        for source, stats in self.capture.latency_stats().items():
+            if stats['events']:
+                print(f"{source}: {stats['events']} events, callback p99 {stats['callback_p99_us']:.1f} us "
+                      f"(max {stats['callback_max_us']:.1f} us), handled within p99 {stats['lag_p99_us'] / 1000:.2f} ms")
+
+
+if __name__ == "__main__":
+    collector = Collector()
+    collector.start()
+    if collector.metrics_publisher:
+        port = collector.metrics_publisher.port
+        print(f"Live metrics on http://127.0.0.1:{port}/events, open index.html?collector_port={port}")
+
+    # Run for a set period of time
+    time.sleep(duration_in_seconds)
+
+    saved_to = collector.stop()
+    collector.print_report()
+    if collector.summary_path:
+        print(f"Data collection completed and saved to '{saved_to}' (summary in '{collector.summary_path}')")
+    else:
+        print(f"Data collection completed and saved to '{saved_to}'")
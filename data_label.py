@@ -1,4 +1,20 @@
+import argparse
+import glob
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import numpy as np
 import pandas as pd
+from session_format import iter_events, load_events, segment_files, session_files
+
+# Interval thresholds (seconds) used by the labeling rules
+label_thresholds = {
+    'keystroke_high': 0.1,  # Below this a keystroke is 'High Speed'
+    'keystroke_medium': 0.5,  # Below this a keystroke is 'Medium Speed', otherwise 'Low Speed'
+    'move_active': 0.1,  # Below this a mouse move is 'Active'
+    'move_moderate': 1.0,  # Below this a mouse move is 'Moderately Active', otherwise 'Inactive'
+}
 
 # Define the labeling rules
 def label_entry(row):
@@ -10,9 +26,9 @@ def label_entry(row):
     # Example rules
     if row['event_type'] == 'keystroke':
         # Typing speed based on interval (arbitrary thresholds for example)
-        if row['interval'] < 0.1:
+        if row['interval'] < label_thresholds['keystroke_high']:
             typing_label = 'High Speed'
-        elif row['interval'] < 0.5:
+        elif row['interval'] < label_thresholds['keystroke_medium']:
             typing_label = 'Medium Speed'
         else:
             typing_label = 'Low Speed'
@@ -21,9 +37,9 @@ def label_entry(row):
     
     if row['event_type'] == 'mouse_move':
         # Mouse behavior based on movement speed (x, y coordinates and interval)
-        if row['interval'] < 0.1:  # Frequent movements
+        if row['interval'] < label_thresholds['move_active']:  # Frequent movements
             behavior_label = 'Active'
-        elif row['interval'] < 1.0:
+        elif row['interval'] < label_thresholds['move_moderate']:
             behavior_label = 'Moderately Active'
         else:
             behavior_label = 'Inactive'
@@ -35,15 +51,249 @@ def label_entry(row):
     # Return combined labels
     return typing_label, behavior_label
 
-# Load the raw data
-file_path = "raw_data.csv"  # Replace with your file path
-data = pd.read_csv(file_path)
+# Vectorized version of label_entry, computes both label columns for the whole table at once
+def label_events(data, thresholds=None):
+    """
+    Assign the same labels as label_entry using column masks.
+    Returns the data with 'Typing_Label' and 'Behavior_Label' added.
+    `thresholds` overrides some or all of label_thresholds.
+    """
+    thresholds = {**label_thresholds, **(thresholds or {})}
+    event_type = data['event_type'].to_numpy()
+    interval = data['interval'].to_numpy(dtype=float)  # NaN compares False, like in label_entry
+
+    is_keystroke = event_type == 'keystroke'
+    is_move = event_type == 'mouse_move'
+    is_click = event_type == 'mouse_click'
+
+    typing_label = np.select(
+        [
+            is_keystroke & (interval < thresholds['keystroke_high']),
+            is_keystroke & (interval < thresholds['keystroke_medium']),
+            is_keystroke,
+        ],
+        ['High Speed', 'Medium Speed', 'Low Speed'],
+        default=None,
+    )
+    behavior_label = np.select(
+        [
+            is_move & (interval < thresholds['move_active']),
+            is_move & (interval < thresholds['move_moderate']),
+            is_move,
+            is_click,
+        ],
+        ['Active', 'Moderately Active', 'Inactive', 'Clicked'],
+        default=None,
+    )
+
+    data = data.copy()
+    data['Typing_Label'] = pd.Series(typing_label, index=data.index, dtype=object)
+    data['Behavior_Label'] = pd.Series(behavior_label, index=data.index, dtype=object)
+    return data
+
+# Reference labeling with the row-wise rules, kept to check label_events against
+def label_events_rowwise(data):
+    data = data.copy()
+    data[['Typing_Label', 'Behavior_Label']] = data.apply(label_entry, axis=1, result_type='expand')
+    return data
+
+# Fill missing intervals (mouse moves) with the time since the previous event of the same type
+def fill_missing_intervals(data, last_timestamps):
+    """
+    Return the data with NaN intervals replaced by the gap to the previous event of the same type.
+    last_timestamps maps event type -> timestamp of its last event in earlier chunks and is updated,
+    so passing the same dict for consecutive chunks gives the same result as one pass over the file.
+    """
+    timestamp = data['timestamp'].to_numpy(dtype=float)
+    event_type = data['event_type'].to_numpy()
+    interval = data['interval'].to_numpy(dtype=float).copy()
+
+    for name in pd.unique(event_type):
+        rows = np.flatnonzero(event_type == name)
+        times = timestamp[rows]
+        previous = np.empty_like(times)
+        previous[0] = last_timestamps.get(name, np.nan)
+        previous[1:] = times[:-1]
+        missing = np.isnan(interval[rows])
+        interval[rows[missing]] = (times - previous)[missing]
+        last_timestamps[name] = times[-1]
+
+    return data.assign(interval=interval)
+
+# Every event of a log, or of all the segments of a streamed session directory in time order
+def load_session_events(input_path):
+    frames = [load_events(path) for path in session_files(input_path)]
+    if len(frames) == 1:
+        return frames[0]
+    return pd.concat(frames, ignore_index=True).sort_values('timestamp', kind='mergesort', ignore_index=True)
+
+# Label a whole file, in chunks of `chunksize` rows if given so memory stays bounded
+def label_file(input_path, output_path, chunksize=None, thresholds=None, fill_intervals=False):
+    """
+    Label the events in input_path and write them to output_path (CSV), returns the number of rows.
+    input_path may be a streamed session directory, its segments are labeled as one log.
+    """
+    if not chunksize:
+        data = load_session_events(input_path)
+        if fill_intervals:
+            data = fill_missing_intervals(data, {})
+        label_events(data, thresholds).to_csv(output_path, index=False)
+        return len(data)
 
-# Apply labeling rules
-data[['Typing_Label', 'Behavior_Label']] = data.apply(label_entry, axis=1, result_type='expand')
+    last_timestamps = {}  # Carried across chunk boundaries
+    rows = 0
+    chunks = (chunk for path in session_files(input_path) for chunk in iter_events(path, chunksize))
+    with open(output_path, mode='w', newline='') as f:
+        for chunk in chunks:
+            if fill_intervals:
+                chunk = fill_missing_intervals(chunk, last_timestamps)
+            label_events(chunk, thresholds).to_csv(f, index=False, header=rows == 0)
+            rows += len(chunk)
+    return rows
 
-# Save the labeled data
-output_file = "labeled_data.csv"
-data.to_csv(output_file, index=False)
+# Output file written next to each session by label_batch
+def labeled_path(input_path):
+    if os.path.isdir(input_path):
+        return os.path.normpath(input_path) + "_labeled.csv"
+    return os.path.splitext(input_path)[0] + "_labeled.csv"
+
+# Session logs matching a glob, or every session log under a directory.
+# A streamed session directory is one session, its segments are not listed separately
+def find_sessions(pattern):
+    if os.path.isdir(pattern):
+        paths = glob.glob(os.path.join(pattern, "**", "*.csv"), recursive=True)
+        paths += glob.glob(os.path.join(pattern, "**", "*.parquet"), recursive=True)
+        paths += glob.glob(os.path.join(pattern, "**", ""), recursive=True)  # Directories
+    else:
+        paths = glob.glob(pattern, recursive=True)
+
+    sessions = set()
+    for path in paths:
+        path = os.path.normpath(path)
+        directory = os.path.dirname(path)
+        if os.path.isdir(path):
+            if segment_files(path):
+                sessions.add(path)
+        elif segment_files(directory):
+            sessions.add(directory)  # A segment or the summary of a streamed session
+        elif not path.endswith("_labeled.csv") and os.path.basename(path) != "summary.csv":
+            sessions.add(path)
+    return sorted(sessions)
+
+# Size and modification time of a session's files, a session that failed is retried once this changes
+def session_signature(input_path):
+    files = session_files(input_path)
+    return {
+        'size': sum(os.path.getsize(path) for path in files),
+        'mtime': max(os.path.getmtime(path) for path in files),
+    }
+
+def load_failures(failures_path):
+    if failures_path and os.path.exists(failures_path):
+        with open(failures_path, "r") as f:
+            return json.load(f)
+    return {}
+
+def save_failures(failures, failures_path):
+    temp_path = failures_path + ".tmp"
+    with open(temp_path, "w") as f:
+        json.dump(failures, f, indent=1)
+    os.replace(temp_path, failures_path)
+
+def _label_session(input_path, output_path, chunksize, thresholds, fill_intervals):
+    try:
+        return label_file(input_path, output_path, chunksize, thresholds, fill_intervals)
+    except Exception:
+        # A partial output would look up to date on the next run
+        if os.path.exists(output_path):
+            os.remove(output_path)
+        raise
+
+# Label many sessions in parallel, skipping the ones whose labeled output is up to date
+def label_batch(pattern, workers=None, chunksize=None, thresholds=None, fill_intervals=False, force=False,
+                failures_path=None):
+    """
+    Label every session matched by `pattern` (directory or glob) with a process pool.
+    Each output is written side by side as <name>_labeled.csv. Returns a summary dict.
+    Failed sessions are recorded in `failures_path` (label_failures.json in the directory,
+    or in the current directory for a glob) and only retried once their files change.
+    """
+    if failures_path is None:
+        failures_path = os.path.join(pattern if os.path.isdir(pattern) else ".", "label_failures.json")
+    failures = load_failures(failures_path)
+    jobs = []
+    skipped = 0
+    failed_before = 0
+    for input_path in find_sessions(pattern):
+        output_path = labeled_path(input_path)
+        signature = session_signature(input_path)
+        if not force and os.path.exists(output_path) and os.path.getmtime(output_path) >= signature['mtime']:
+            skipped += 1
+            continue
+        failure = failures.get(input_path)
+        if not force and failure and failure['size'] == signature['size'] and failure['mtime'] == signature['mtime']:
+            failed_before += 1
+            continue
+        jobs.append((input_path, output_path, signature))
+
+    start = time.perf_counter()
+    sessions = 0
+    events = 0
+    failed = []
+    if jobs:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = {
+                pool.submit(_label_session, input_path, output_path, chunksize, thresholds, fill_intervals):
+                    (input_path, signature)
+                for input_path, output_path, signature in jobs
+            }
+            for future in as_completed(futures):
+                input_path, signature = futures[future]
+                try:
+                    events += future.result()
+                    sessions += 1
+                    failures.pop(input_path, None)
+                except Exception as e:
+                    failed.append(input_path)
+                    failures[input_path] = {**signature, 'error': str(e)}
+                    print(f"Error labeling {input_path}: {e}")
+        if failures_path and (failures or os.path.exists(failures_path)):
+            save_failures(failures, failures_path)
+    elapsed = time.perf_counter() - start
+
+    summary = {
+        'sessions': sessions,
+        'events': events,
+        'skipped': skipped,
+        'failed': failed,
+        'failed_before': failed_before,
+        'seconds': elapsed,
+        'sessions_per_second': sessions / elapsed if elapsed else 0,
+        'events_per_second': events / elapsed if elapsed else 0,
+    }
+    print(
+        f"Labeled {sessions} sessions ({events} events) in {elapsed:.2f}s: "
+        f"{summary['sessions_per_second']:.1f} sessions/s, {summary['events_per_second']:.0f} events/s "
+        f"({skipped} up to date, {len(failed)} failed, {failed_before} failed before and unchanged)"
+    )
+    return summary
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Label captured activity events.")
+    parser.add_argument("file_path", nargs="?", default="raw_data.csv", help="CSV activity log or Parquet session")
+    parser.add_argument("output_file", nargs="?", default="labeled_data.csv")
+    parser.add_argument("--chunksize", type=int, default=None, help="Stream the input in chunks of this many rows")
+    parser.add_argument("--fill-intervals", action="store_true", help="Derive missing intervals from timestamps")
+    parser.add_argument("--batch", metavar="PATTERN", help="Label every session in a directory or matching a glob")
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes for --batch (default: all cores)")
+    parser.add_argument("--force", action="store_true",
+                        help="With --batch, also relabel sessions that are up to date or failed before")
+    args = parser.parse_args()
+
+    if args.batch:
+        label_batch(args.batch, args.workers, args.chunksize, fill_intervals=args.fill_intervals, force=args.force)
+    else:
+        # Load, label and save the data
+        label_file(args.file_path, args.output_file, args.chunksize, fill_intervals=args.fill_intervals)
 
-print(f"Labeled data saved to {output_file}")
\ No newline at end of file
+        print(f"Labeled data saved to {args.output_file}")
\ No newline at end of file
@@ -0,0 +1,172 @@
+import threading
+import numpy as np
+import pandas as pd
+
+# Column layout of the event table written by data_collection.py
+COLUMNS = ['timestamp', 'event_type', 'key', 'interval', 'x', 'y', 'button']
+
+# Columns captured for each kind of event (besides the timestamp)
+EVENT_FIELDS = {
+    'keystroke': ('key', 'interval'),
+    'mouse_move': ('x', 'y'),
+    'mouse_click': ('x', 'y', 'button', 'interval'),
+}
+
+# Storage type of each column, key and button hold interned codes (-1 = none)
+FIELD_DTYPES = {
+    'timestamp': np.float64,
+    'interval': np.float64,
+    'x': np.int32,
+    'y': np.int32,
+    'key': np.int32,
+    'button': np.int32,
+}
+
+SYMBOL_FIELDS = ('key', 'button')
+
+
+class SymbolTable:
+    """Interns key and button names to small integer codes."""
+
+    def __init__(self):
+        self.codes = {}
+        self.names = []
+        self._lock = threading.Lock()
+
+    def intern(self, name):
+        if name is None:
+            return -1
+        code = self.codes.get(name)
+        if code is None:
+            # Listener threads may race on a new name, only one of them assigns it
+            with self._lock:
+                code = self.codes.get(name)
+                if code is None:
+                    code = len(self.names)
+                    self.names.append(name)
+                    self.codes[name] = code
+        return code
+
+    def decode(self, codes):
+        """Map an array of codes back to names (None for -1)."""
+        lookup = np.array(self.names + [None], dtype=object)
+        return lookup[codes]
+
+    def __len__(self):
+        return len(self.names)
+
+
+class EventStore:
+    """
+    Preallocated columnar buffer for one kind of captured event.
+    - Unbounded mode grows by allocating a new chunk of `chunk_size` rows.
+    - Ring mode (`capacity` set) keeps only the newest `capacity` rows and
+      counts the overwritten ones in `dropped`.
+    """
+
+    def __init__(self, event_type, chunk_size=4096, capacity=None, symbols=None):
+        self.event_type = event_type
+        self.fields = ('timestamp',) + EVENT_FIELDS[event_type]
+        self.capacity = capacity
+        self.chunk_size = capacity if capacity else chunk_size
+        self.symbols = symbols if symbols is not None else SymbolTable()
+        self.dropped = 0
+        self._lock = threading.Lock()
+        self._chunks = []
+        self._pos = 0
+        self._count = 0
+        self._new_chunk()
+
+    def _new_chunk(self):
+        self._chunks.append({name: np.empty(self.chunk_size, dtype=FIELD_DTYPES[name]) for name in self.fields})
+        self._pos = 0
+
+    def append(self, timestamp, x=0, y=0, interval=np.nan, key=None, button=None, key_code=None):
+        """Store one event, key and button are given as names (or the key as its code in `symbols`)."""
+        with self._lock:
+            if self._pos == self.chunk_size:
+                if self.capacity:
+                    self._pos = 0  # Wrap around and overwrite the oldest rows
+                else:
+                    self._new_chunk()
+            if self.capacity and self._count >= self.capacity:
+                self.dropped += 1
+
+            chunk = self._chunks[-1]
+            i = self._pos
+            chunk['timestamp'][i] = timestamp
+            if 'x' in chunk:
+                chunk['x'][i] = x
+                chunk['y'][i] = y
+            if 'interval' in chunk:
+                chunk['interval'][i] = interval
+            if 'key' in chunk:
+                chunk['key'][i] = key_code if key_code is not None else self.symbols.intern(key)
+            if 'button' in chunk:
+                chunk['button'][i] = self.symbols.intern(button)
+            self._pos += 1
+            self._count += 1
+
+    def __len__(self):
+        if self.capacity:
+            return min(self._count, self.capacity)
+        return self._count
+
+    def _collect(self):
+        if self.capacity:
+            chunk = self._chunks[0]
+            if self._count > self.capacity:
+                order = np.r_[self._pos:self.capacity, 0:self._pos]
+                return {name: chunk[name][order] for name in self.fields}
+            return {name: chunk[name][:self._pos].copy() for name in self.fields}
+
+        last = len(self._chunks) - 1
+        return {
+            name: np.concatenate([
+                chunk[name] if index < last else chunk[name][:self._pos]
+                for index, chunk in enumerate(self._chunks)
+            ])
+            for name in self.fields
+        }
+
+    def _reset(self):
+        self._chunks = []
+        self._count = 0
+        self._new_chunk()
+
+    def to_arrays(self):
+        """Return a copy of the stored columns as NumPy arrays in arrival order."""
+        with self._lock:
+            return self._collect()
+
+    def drain(self):
+        """Return the stored columns like to_arrays() and release the rows."""
+        with self._lock:
+            arrays = self._collect()
+            self._reset()
+            return arrays
+
+    def arrays_to_dataframe(self, arrays):
+        """Build a DataFrame with names decoded from columns returned by to_arrays()/drain()."""
+        data = {'timestamp': arrays['timestamp'], 'event_type': self.event_type}
+        for name in self.fields[1:]:
+            column = arrays[name]
+            data[name] = self.symbols.decode(column) if name in SYMBOL_FIELDS else column
+        return pd.DataFrame(data, columns=['timestamp', 'event_type'] + list(self.fields[1:]))
+
+    def to_dataframe(self):
+        """Return the stored events as a DataFrame with names decoded."""
+        return self.arrays_to_dataframe(self.to_arrays())
+
+    def clear(self):
+        with self._lock:
+            self._reset()
+            self.dropped = 0
+
+
+def events_to_dataframe(*stores):
+    """Combine several stores into one event table with the standard columns."""
+    frames = [store.to_dataframe() for store in stores if len(store)]
+    if not frames:
+        return pd.DataFrame(columns=COLUMNS)
+    return pd.concat(frames, ignore_index=True).reindex(columns=COLUMNS)
@@ -0,0 +1,146 @@
+import argparse
+import hashlib
+import os
+import numpy as np
+import pandas as pd
+from session_format import load_events, session_files
+
+# Bump when the features change, cached matrices of older versions are recomputed
+FEATURE_VERSION = 1
+
+FEATURE_COLUMNS = [
+    'keystrokes',
+    'keystroke_rate',  # Keystrokes per second
+    'backspace_ratio',  # Share of the keystrokes that are BACKSPACE
+    'interval_p10',  # Inter-key interval percentiles (seconds)
+    'interval_p50',
+    'interval_p90',
+    'mouse_moves',
+    'path_length',  # Pixels travelled by the pointer
+    'mean_velocity',  # path_length per second of the window
+    'max_velocity',  # Fastest step between two moves (pixels per second)
+    'clicks',
+]
+
+
+def load_session(path):
+    columns = ['timestamp', 'event_type', 'key', 'interval', 'x', 'y']
+    frames = [load_events(file, columns) for file in session_files(path)]
+    if not frames:
+        return pd.DataFrame(columns=columns)
+    return pd.concat(frames, ignore_index=True).sort_values('timestamp', kind='mergesort')
+
+
+def extract_features(events, window_seconds=5):
+    """
+    Per-window feature matrix of one session's event table.
+    Windows are `window_seconds` long from the first event, windows without events
+    are kept (all zeros) so rows are evenly spaced. Percentiles of a window without
+    keystrokes are 0. Returns a DataFrame of FEATURE_COLUMNS indexed by window start (seconds).
+    """
+    if events.empty:
+        return pd.DataFrame(columns=FEATURE_COLUMNS, dtype=float)
+    timestamp = events['timestamp'].to_numpy(dtype=float)
+    start = timestamp.min()
+    window = ((timestamp - start) // window_seconds).astype(np.int64)
+    n_windows = int(window.max()) + 1
+    event_type = events['event_type'].to_numpy()
+
+    # Keystrokes
+    is_key = event_type == 'keystroke'
+    keys = pd.DataFrame({
+        'window': window[is_key],
+        'interval': events['interval'].to_numpy(dtype=float)[is_key],
+        'backspace': events['key'].to_numpy()[is_key] == 'BACKSPACE',
+    })
+    grouped = keys.groupby('window')
+    key_features = pd.DataFrame({
+        'keystrokes': grouped.size(),
+        'backspaces': grouped['backspace'].sum(),
+        'interval_p10': grouped['interval'].quantile(0.1),
+        'interval_p50': grouped['interval'].quantile(0.5),
+        'interval_p90': grouped['interval'].quantile(0.9),
+    })
+
+    # Mouse path: each step is counted in the window of the move that ends it
+    is_move = event_type == 'mouse_move'
+    move_time = timestamp[is_move]
+    steps = np.hypot(np.diff(events['x'].to_numpy(dtype=float)[is_move]), np.diff(events['y'].to_numpy(dtype=float)[is_move]))
+    step_time = np.diff(move_time)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        step_velocity = np.where(step_time > 0, steps / step_time, 0.0)
+    moves = pd.DataFrame({'window': window[is_move]})
+    move_features = pd.DataFrame({'mouse_moves': moves.groupby('window').size()})
+    step_frame = pd.DataFrame({'window': window[is_move][1:], 'step': steps, 'velocity': step_velocity})
+    step_grouped = step_frame.groupby('window')
+    move_features['path_length'] = step_grouped['step'].sum()
+    move_features['max_velocity'] = step_grouped['velocity'].max()
+
+    clicks = pd.Series(window[event_type == 'mouse_click']).value_counts().rename('clicks')
+
+    features = pd.concat([key_features, move_features, clicks], axis=1).reindex(range(n_windows)).fillna(0)
+    features['keystroke_rate'] = features['keystrokes'] / window_seconds
+    features['backspace_ratio'] = features['backspaces'] / features['keystrokes'].clip(lower=1)
+    features['mean_velocity'] = features['path_length'] / window_seconds
+    features.index = start + features.index * window_seconds
+    features.index.name = 'window_start'
+    return features[FEATURE_COLUMNS].astype(float)
+
+
+def content_hash(path, window_seconds):
+    """Hash of the session's event files and the feature settings, the cache key."""
+    digest = hashlib.sha256(f"features-v{FEATURE_VERSION}-{window_seconds}".encode())
+    for file in session_files(path):
+        digest.update(os.path.basename(file).encode())
+        with open(file, "rb") as handle:
+            for block in iter(lambda: handle.read(1 << 20), b""):
+                digest.update(block)
+    return digest.hexdigest()
+
+
+def session_features(path, window_seconds=5, cache_dir="feature_cache"):
+    """
+    Feature matrix of the session at `path`, read from the cache when the session's
+    content is unchanged. Returns (features DataFrame, cached).
+    """
+    key = content_hash(path, window_seconds) if cache_dir else None
+    cache_path = os.path.join(cache_dir, key + ".npz") if key else None
+    if cache_path and os.path.exists(cache_path):
+        with np.load(cache_path) as cached:
+            features = pd.DataFrame(cached['matrix'], index=pd.Index(cached['window_start'], name='window_start'),
+                                    columns=list(cached['columns']))
+        return features, True
+
+    features = extract_features(load_session(path), window_seconds)
+    if cache_path:
+        os.makedirs(cache_dir, exist_ok=True)
+        temp_path = cache_path + ".tmp.npz"
+        np.savez(temp_path, matrix=features.to_numpy(), window_start=features.index.to_numpy(),
+                 columns=np.array(FEATURE_COLUMNS))
+        os.replace(temp_path, cache_path)
+    return features, False
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Extract per-window feature matrices from captured sessions.")
+    parser.add_argument("sessions", nargs="+", help="CSV activity logs, Parquet sessions or streamed session directories")
+    parser.add_argument("--window", type=float, default=5, help="Window length in seconds")
+    parser.add_argument("--output", default="features.parquet", help="Combined matrix, .parquet (needs pyarrow) or .npz")
+    parser.add_argument("--cache-dir", default="feature_cache", help="Per-session cache ('' to disable)")
+    args = parser.parse_args()
+
+    frames = []
+    cached_count = 0
+    for path in args.sessions:
+        features, cached = session_features(path, args.window, args.cache_dir)
+        cached_count += cached
+        frames.append(features.reset_index().assign(session=path))
+    matrix = pd.concat(frames, ignore_index=True)[['session', 'window_start'] + FEATURE_COLUMNS]
+
+    if args.output.endswith(".npz"):
+        np.savez(args.output, matrix=matrix[FEATURE_COLUMNS].to_numpy(), window_start=matrix['window_start'].to_numpy(),
+                 session=matrix['session'].to_numpy(dtype=str), columns=np.array(FEATURE_COLUMNS))
+    else:
+        matrix.to_parquet(args.output, index=False)
+    print(f"{len(matrix)} windows x {len(FEATURE_COLUMNS)} features from {len(args.sessions)} sessions "
+          f"({cached_count} from cache) saved to {args.output}")
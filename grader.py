@@ -0,0 +1,173 @@
+import argparse
+import csv
+import glob
+import hashlib
+import json
+import os
+import secrets
+import time
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+from code_runner import CodeRunner
+
+# Test cases are a JSON list of objects:
+#   {"name": "...", "code": "assert reverse('ab') == 'ba'", "expected_output": "..."}
+# "code" runs after the submission (a failing assert fails the test), "expected_output"
+# is compared with the stripped stdout. Both are optional. A run only passes when it
+# reaches the end of the test code, exiting early (sys.exit(0), os._exit) fails it.
+
+
+def load_tests(path):
+    with open(path, "r") as file:
+        tests = json.load(file)
+    for number, test in enumerate(tests):
+        test.setdefault("name", f"test_{number + 1}")
+    return tests
+
+
+def load_submissions(pattern):
+    """Map submission id (file name without extension) -> code for a directory or glob of .py files."""
+    paths = glob.glob(os.path.join(pattern, "*.py")) if os.path.isdir(pattern) else glob.glob(pattern)
+    submissions = {}
+    for path in sorted(paths):
+        with open(path, "r", encoding="utf-8") as file:
+            submissions[os.path.splitext(os.path.basename(path))[0]] = file.read()
+    return submissions
+
+
+def result_key(code, test):
+    """Cache key of one submission/test pair, changes when either of them changes."""
+    digest = hashlib.sha256(code.encode("utf-8"))
+    digest.update(b"\0")
+    digest.update(json.dumps(test, sort_keys=True).encode("utf-8"))
+    return digest.hexdigest()
+
+
+def run_test(runner, code, test, timeout):
+    """Run one test against one submission, like pressing Run in the IDE."""
+    # Printed once the test code has run, new for every run so a submission can't print it itself
+    sentinel = f"grader-done-{secrets.token_hex(16)}"
+    source = code + "\n\n" + test.get("code", "") + f"\n\nprint({sentinel!r})\n"
+    result = runner.run(source, timeout)
+    stdout = result.stdout.rstrip()
+
+    if result.timed_out:
+        status, message = "timeout", f"No result after {timeout}s"
+    elif result.returncode != 0:
+        lines = result.stderr.strip().splitlines()
+        status, message = "failed", lines[-1] if lines else f"Exit code {result.returncode}"
+    elif not stdout.endswith(sentinel):
+        status, message = "failed", "Exited before the test finished"
+    elif "expected_output" in test and stdout[:-len(sentinel)].strip() != test["expected_output"].strip():
+        status, message = "failed", "Output does not match"
+    else:
+        status, message = "passed", ""
+    return {"status": status, "message": message, "duration": result.duration}
+
+
+class Grader:
+    """
+    Grades many submissions against the same tests in parallel.
+    - Runs go through CodeRunner, so they behave exactly like the IDE's Run button.
+    - Up to `workers` runs execute at once, each with its own `timeout`.
+    - Results are cached per submission/test hash in `cache_path`, re-grading only
+      runs the pairs whose code or test changed. Timeouts are not cached, they may
+      come from a busy machine rather than the code, and are run again next time.
+    """
+
+    def __init__(self, tests, workers=None, timeout=10, cache_path="grading_cache.json"):
+        self.tests = tests
+        self.workers = workers or os.cpu_count() or 2
+        self.timeout = timeout
+        self.cache_path = cache_path
+        self.cache = {}
+        if cache_path and os.path.exists(cache_path):
+            with open(cache_path, "r") as file:
+                self.cache = {key: result for key, result in json.load(file).items() if result["status"] != "timeout"}
+
+    def save_cache(self):
+        if not self.cache_path:
+            return
+        temp_path = self.cache_path + ".tmp"
+        with open(temp_path, "w") as file:
+            json.dump(self.cache, file)
+        os.replace(temp_path, self.cache_path)
+
+    def grade(self, submissions):
+        """Grade {submission id: code}, returns (rows, stats)."""
+        pairs = [(sid, code, test) for sid, code in submissions.items() for test in self.tests]
+        keys = [result_key(code, test) for _, code, test in pairs]
+        todo = [(key, code, test) for key, (_, code, test) in zip(keys, pairs) if key not in self.cache]
+
+        started = time.perf_counter()
+        fresh = {}  # Results of this call, including the timeouts that are not cached
+        if todo:
+            runner = CodeRunner(pool_size=self.workers, timeout=self.timeout)
+            try:
+                with ThreadPoolExecutor(max_workers=self.workers) as pool:
+                    results = pool.map(lambda job: run_test(runner, job[1], job[2], self.timeout), todo)
+                    for (key, _, _), result in zip(todo, results):
+                        fresh[key] = result
+                        if result["status"] != "timeout":
+                            self.cache[key] = result
+            finally:
+                runner.shutdown()
+            self.save_cache()
+        elapsed = time.perf_counter() - started
+
+        rows = []
+        for sid, code in submissions.items():
+            results = [fresh.get(key) or self.cache[key] for key in (result_key(code, test) for test in self.tests)]
+            rows.append({
+                "submission": sid,
+                "passed": sum(result["status"] == "passed" for result in results),
+                "total": len(results),
+                **{test["name"]: result["status"] for test, result in zip(self.tests, results)},
+            })
+
+        durations = np.array([fresh[key]["duration"] for key, _, _ in todo]) if todo else np.zeros(1)
+        stats = {
+            "submissions": len(submissions),
+            "runs": len(todo),
+            "cached": len(pairs) - len(todo),
+            "seconds": elapsed,
+            "runs_per_second": len(todo) / elapsed if elapsed else 0,
+            "submissions_per_second": len(submissions) / elapsed if elapsed else 0,
+            "p50": float(np.percentile(durations, 50)),
+            "p90": float(np.percentile(durations, 90)),
+            "p99": float(np.percentile(durations, 99)),
+        }
+        return rows, stats
+
+
+def save_grades(rows, tests, path):
+    with open(path, mode="w", newline="") as file:
+        writer = csv.DictWriter(file, fieldnames=["submission", "passed", "total"] + [test["name"] for test in tests])
+        writer.writeheader()
+        writer.writerows(rows)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Grade coding submissions against test cases.")
+    parser.add_argument("submissions", help="Directory of .py submissions or a glob")
+    parser.add_argument("tests", help="JSON file with the test cases")
+    parser.add_argument("--output", default="grades.csv")
+    parser.add_argument("--workers", type=int, default=None, help="Parallel runs (default: all cores)")
+    parser.add_argument("--timeout", type=float, default=10, help="Seconds per run")
+    parser.add_argument("--cache", default="grading_cache.json", help="Result cache file ('' to disable)")
+    args = parser.parse_args()
+
+    tests = load_tests(args.tests)
+    grader = Grader(tests, args.workers, args.timeout, args.cache)
+    rows, stats = grader.grade(load_submissions(args.submissions))
+    save_grades(rows, tests, args.output)
+
+    if stats['runs']:
+        print(f"Graded {stats['submissions']} submissions in {stats['seconds']:.2f}s "
+              f"({stats['runs']} runs, {stats['cached']} cached): "
+              f"{stats['submissions_per_second']:.1f} submissions/s, {stats['runs_per_second']:.1f} runs/s")
+        print(f"Run latency p50 {stats['p50'] * 1000:.0f} ms, p90 {stats['p90'] * 1000:.0f} ms, "
+              f"p99 {stats['p99'] * 1000:.0f} ms")
+    else:
+        print(f"Graded {stats['submissions']} submissions, all {stats['cached']} results cached")
+    print(f"Grades saved to {args.output}")
@@ -0,0 +1,71 @@
+import enum
+
+# Names of the special keys that get a short label, other special keys keep 'Key.<name>'
+SPECIAL_KEY_NAMES = {
+    'space': 'SPACE',
+    'backspace': 'BACKSPACE',
+    'right': 'RIGHT_ARROW',
+    'left': 'LEFT_ARROW',
+    'up': 'UP_ARROW',
+    'down': 'DOWN_ARROW',
+    'esc': 'ESC',
+    'enter': 'ENTER',
+}
+
+
+def char_name(char):
+    """Name of a typed character, control characters (Ctrl combinations) become 'ctrl-A' ... 'ctrl-_'."""
+    code = ord(char) if len(char) == 1 else -1
+    if 0 < code < 32:
+        return 'ctrl-' + chr(code + 64)
+    return char
+
+
+def key_name(key):
+    """Human-readable name of a pynput key (Key member or KeyCode), without any caching."""
+    if isinstance(key, enum.Enum):
+        return SPECIAL_KEY_NAMES.get(key.name, f"Key.{key.name}")
+    char = getattr(key, 'char', None)
+    if char is not None:
+        return char_name(char)
+    vk = getattr(key, 'vk', None)
+    if vk is not None:
+        return f"<{vk}>"
+    return str(key)
+
+
+class KeyNormalizer:
+    """
+    Maps pynput keys to (name, code) pairs, where code is the key's small integer in `symbols`.
+    Every distinct key is resolved once. Later lookups are a single dict hit keyed by
+    the typed character, the virtual key code, or the Key member, never by the
+    KeyCode object itself (its hash builds its repr on every call).
+    """
+
+    def __init__(self, symbols):
+        self.symbols = symbols
+        self._by_char = {}
+        self._by_vk = {}
+        self._by_key = {}
+
+    def resolve(self, key):
+        char = getattr(key, 'char', None)
+        if char is not None:
+            cache, cache_key = self._by_char, char
+        else:
+            vk = getattr(key, 'vk', None)
+            if vk is not None:
+                cache, cache_key = self._by_vk, vk
+            else:
+                cache, cache_key = self._by_key, key
+        entry = cache.get(cache_key)
+        if entry is None:
+            name = key_name(key)
+            entry = cache[cache_key] = (name, self.symbols.intern(name))
+        return entry
+
+    def name(self, key):
+        return self.resolve(key)[0]
+
+    def code(self, key):
+        return self.resolve(key)[1]
@@ -0,0 +1,210 @@
+import math
+import threading
+import time
+from collections import deque
+
+# Sliding windows (seconds) kept besides the whole session
+METRIC_WINDOWS = (10, 60)
+# A gap without any input longer than this counts as idle time (seconds)
+IDLE_AFTER = 2.0
+
+
+class RunningStats:
+    """
+    Count, mean and variance of (timestamp, value) samples, updated with Welford's method.
+    With `seconds` set, samples older than `seconds` are dropped by expire(), every
+    sample is added and removed once so the cost per sample is O(1) amortised.
+    """
+
+    def __init__(self, seconds=None):
+        self.seconds = seconds
+        self.samples = deque() if seconds else None
+        self.count = 0
+        self._mean = 0.0
+        self._m2 = 0.0  # Sum of squared differences from the mean
+
+    def add(self, timestamp, value):
+        self.count += 1
+        delta = value - self._mean
+        self._mean += delta / self.count
+        self._m2 += delta * (value - self._mean)
+        if self.samples is not None:
+            self.samples.append((timestamp, value))
+
+    def _remove(self, value):
+        self.count -= 1
+        if not self.count:
+            # Start from exact zeros again, the removals leave rounding residue
+            self._mean = self._m2 = 0.0
+            return
+        mean = self._mean
+        self._mean -= (value - mean) / self.count
+        self._m2 -= (value - mean) * (value - self._mean)
+
+    def expire(self, now):
+        if self.samples is None:
+            return
+        cutoff = now - self.seconds
+        samples = self.samples
+        while samples and samples[0][0] < cutoff:
+            self._remove(samples.popleft()[1])
+
+    def mean(self):
+        return self._mean if self.count else 0.0
+
+    def variance(self):
+        if self.count < 2:
+            return 0.0
+        return max(0.0, self._m2 / (self.count - 1))
+
+
+class IdleGaps:
+    """
+    Idle gaps as (start, end) pairs, only the part of a gap inside the window is counted.
+    Gaps don't overlap and arrive in order, so at most the oldest one straddles the
+    window start and the idle time is the running total minus its part before the cutoff.
+    """
+
+    def __init__(self, seconds=None):
+        self.seconds = seconds
+        self.gaps = deque()
+        self.total = 0.0
+
+    def add(self, start, end):
+        self.gaps.append((start, end))
+        self.total += end - start
+
+    def expire(self, now):
+        if self.seconds is None:
+            return
+        cutoff = now - self.seconds
+        gaps = self.gaps
+        while gaps and gaps[0][1] <= cutoff:
+            start, end = gaps.popleft()
+            self.total -= end - start
+        if not gaps:
+            self.total = 0.0
+
+    def seconds_since(self, cutoff):
+        """Idle seconds after `cutoff` (the window start)."""
+        if not self.gaps:
+            return 0.0
+        return max(0.0, self.total - max(0.0, cutoff - self.gaps[0][0]))
+
+
+class MetricsEngine:
+    """
+    Live typing and mouse metrics, over sliding windows and the whole session.
+    - keystroke(), click() and activity() are called for every captured event and cost
+      O(1) amortised per window.
+    - snapshot() returns a plain dict per window ('10s', '60s', ..., 'session') in O(1),
+      it can be called from any thread while capture runs.
+    - Idle time is the time spent in gaps without any input (moves included) longer
+      than `idle_after` seconds, the current gap counts once it is long enough. Only
+      the part of a gap that falls inside a window is counted for that window.
+    - Events are also counted per whole second and event type for the longest window,
+      see histogram().
+    """
+
+    def __init__(self, windows=METRIC_WINDOWS, idle_after=IDLE_AFTER, start=None):
+        self.windows = [(f"{seconds}s", seconds) for seconds in windows] + [("session", None)]
+        self.idle_after = idle_after
+        self.start = time.time() if start is None else start
+        self.last_activity = self.start
+        self.keys = {name: RunningStats(seconds) for name, seconds in self.windows}
+        self.clicks = {name: RunningStats(seconds) for name, seconds in self.windows}
+        self.idle = {name: IdleGaps(seconds) for name, seconds in self.windows}
+        self.history_seconds = max(windows, default=60)
+        self.per_second = {}  # int(second) -> {event type: count}
+        self._seconds = deque()  # Keys of per_second in arrival order
+        self._lock = threading.Lock()
+
+    def _expire(self, now):
+        for name, _ in self.windows:
+            self.keys[name].expire(now)
+            self.clicks[name].expire(now)
+            self.idle[name].expire(now)
+        cutoff = now - self.history_seconds
+        while self._seconds and self._seconds[0] < cutoff:
+            del self.per_second[self._seconds.popleft()]
+
+    def activity(self, timestamp, event_type='mouse_move'):
+        """Any input event, ends the current idle gap."""
+        gap = timestamp - self.last_activity
+        second = int(timestamp)
+        with self._lock:
+            if gap > self.idle_after:
+                for name, _ in self.windows:
+                    self.idle[name].add(self.last_activity, timestamp)
+            counts = self.per_second.get(second)
+            if counts is None:
+                counts = self.per_second[second] = {}
+                self._seconds.append(second)
+            counts[event_type] = counts.get(event_type, 0) + 1
+        if timestamp > self.last_activity:
+            self.last_activity = timestamp
+
+    def keystroke(self, timestamp, interval):
+        self.activity(timestamp, 'keystroke')
+        with self._lock:
+            for name, _ in self.windows:
+                self.keys[name].add(timestamp, interval)
+            self._expire(timestamp)
+
+    def click(self, timestamp, interval):
+        self.activity(timestamp, 'mouse_click')
+        with self._lock:
+            for name, _ in self.windows:
+                self.clicks[name].add(timestamp, interval)
+            self._expire(timestamp)
+
+    def snapshot(self, now=None):
+        """Current metrics of every window."""
+        now = time.time() if now is None else now
+        elapsed = max(now - self.start, 1e-9)
+        idle_since = self.last_activity if now - self.last_activity > self.idle_after else None
+        result = {'timestamp': now}
+        with self._lock:
+            self._expire(now)
+            for name, seconds in self.windows:
+                span = min(seconds, elapsed) if seconds else elapsed  # Shorter at the start of the session
+                cutoff = now - span
+                idle_seconds = self.idle[name].seconds_since(cutoff)
+                if idle_since is not None:
+                    idle_seconds += now - max(idle_since, cutoff)  # The gap still going on
+                keys, clicks = self.keys[name], self.clicks[name]
+                typing_speed_kpm = keys.count / span * 60
+                result[name] = {
+                    'keystrokes': keys.count,
+                    'typing_speed_kpm': typing_speed_kpm,
+                    'typing_speed_wpm': typing_speed_kpm / 5,  # Assuming average word length is 5 characters
+                    'interval_mean': keys.mean(),
+                    'interval_variance': keys.variance(),
+                    'clicks': clicks.count,
+                    'clicks_per_minute': clicks.count / span * 60,
+                    'click_interval_mean': clicks.mean(),
+                    'idle_seconds': min(span, idle_seconds),
+                }
+        return result
+
+    def histogram(self, since=None, until=None):
+        """Event counts per second in [since, until), {second: {event type: count}}."""
+        with self._lock:
+            return {
+                second: dict(counts) for second, counts in self.per_second.items()
+                if (since is None or second >= since) and (until is None or second < until)
+            }
+
+
+def format_snapshot(snapshot):
+    """One line per window, for printing."""
+    lines = []
+    for name, metrics in snapshot.items():
+        if name == 'timestamp':
+            continue
+        lines.append(
+            f"{name:>8}: {metrics['typing_speed_kpm']:6.1f} KPM {metrics['typing_speed_wpm']:5.1f} WPM, "
+            f"interval {metrics['interval_mean']:.3f}s (sd {math.sqrt(metrics['interval_variance']):.3f}s), "
+            f"{metrics['clicks_per_minute']:5.1f} clicks/min, idle {metrics['idle_seconds']:.1f}s"
+        )
+    return "\n".join(lines)
@@ -0,0 +1,225 @@
+import json
+import queue
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+KEEPALIVE_SECONDS = 15
+
+
+def round_metrics(snapshot, digits=3):
+    """Snapshot with the floats rounded, so tiny changes don't count as a change."""
+    return {
+        name: {field: round(value, digits) if isinstance(value, float) else value for field, value in metrics.items()}
+        for name, metrics in snapshot.items() if name != 'timestamp'
+    }
+
+
+def diff_metrics(previous, current):
+    """Only the fields of `current` that differ from `previous`, per window."""
+    delta = {}
+    for name, metrics in current.items():
+        old = previous.get(name, {})
+        changed = {field: value for field, value in metrics.items() if old.get(field) != value}
+        if changed:
+            delta[name] = changed
+    return delta
+
+
+class Client:
+    """One connected dashboard: its own bounded queue, a slow client only loses its own messages."""
+
+    def __init__(self, max_queued):
+        self.messages = queue.Queue(maxsize=max_queued)
+        self.needs_snapshot = True  # Deltas only make sense after a full snapshot
+        self.dropped = 0
+
+    def close(self):
+        """Queue the end of the stream, dropping the oldest queued messages if it doesn't fit."""
+        while True:
+            try:
+                self.messages.put_nowait(None)
+                return
+            except queue.Full:
+                pass
+            try:
+                self.messages.get_nowait()
+                self.dropped += 1
+            except queue.Empty:
+                pass  # The handler took one meanwhile
+
+
+class MetricsPublisher:
+    """
+    Serves the live metrics of a MetricsEngine to dashboards as server-sent events.
+    - GET /events is an event stream: a full snapshot first, then every `interval_ms`
+      milliseconds a delta with only the metrics that changed and the per-second event
+      counts of the seconds completed since the previous push. Nothing is sent for a
+      tick where nothing changed.
+    - GET /snapshot returns the current full snapshot once, as JSON.
+    - Snapshots are taken on the publisher's own thread, each client is written to
+      from its own server thread through a queue of at most `max_queued` messages.
+      A client that falls behind drops messages and gets a full snapshot again, the
+      capture threads are never held up.
+    Only listens on localhost by default.
+    """
+
+    def __init__(self, engine, host="127.0.0.1", port=8765, interval_ms=1000, max_queued=16):
+        self.engine = engine
+        self.host = host
+        self.port = port
+        self.interval = interval_ms / 1000
+        self.max_queued = max_queued
+        self.clients = set()
+        self.sequence = 0
+        self.messages_sent = 0
+        self._clients_lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self._metrics = {}  # Rounded metrics as of the last push
+        self._sent_until = int(time.time())  # Histogram seconds before this were pushed
+        self._server = None
+        self._thread = None
+        self._publish_lock = threading.Lock()  # One publish() at a time, the state below is shared
+
+    def start(self):
+        handler = type("Handler", (MetricsRequestHandler,), {"publisher": self})
+        self._server = ThreadingHTTPServer((self.host, self.port), handler)
+        self._server.daemon_threads = True
+        self.port = self._server.server_address[1]
+        threading.Thread(target=self._server.serve_forever, name="MetricsServer", daemon=True).start()
+        self._thread = threading.Thread(target=self._run, name="MetricsPublisher", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """Push a last update to every client, then close their streams and the server."""
+        self._stop_event.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        self.publish()
+        if self._server:
+            self._server.shutdown()
+            self._server.server_close()
+        with self._clients_lock:
+            for client in self.clients:
+                client.close()
+
+    @property
+    def stopped(self):
+        return self._stop_event.is_set()
+
+    def full_snapshot(self, snapshot=None):
+        snapshot = snapshot or self.engine.snapshot()
+        return {
+            'type': 'snapshot',
+            'seq': self.sequence,
+            'timestamp': snapshot['timestamp'],
+            'metrics': round_metrics(snapshot),
+            'histogram': self.engine.histogram(until=int(snapshot['timestamp'])),
+        }
+
+    def _run(self):
+        while not self._stop_event.wait(self.interval):
+            self.publish()
+
+    def publish(self):
+        """Push one delta to every client, called every `interval_ms`."""
+        with self._publish_lock:
+            self._publish()
+
+    def _publish(self):
+        snapshot = self.engine.snapshot()
+        metrics = round_metrics(snapshot)
+        now_second = int(snapshot['timestamp'])
+        delta = diff_metrics(self._metrics, metrics)
+        histogram = self.engine.histogram(since=self._sent_until, until=now_second)
+        self._metrics = metrics
+        self._sent_until = max(self._sent_until, now_second)
+
+        with self._clients_lock:
+            clients = list(self.clients)
+        if not clients:
+            return
+        if delta or histogram:
+            self.sequence += 1
+            message = {'type': 'delta', 'seq': self.sequence, 'timestamp': snapshot['timestamp']}
+            if delta:
+                message['metrics'] = delta
+            if histogram:
+                message['histogram'] = histogram
+            encoded = json.dumps(message)
+        else:
+            encoded = None
+
+        full = None
+        for client in clients:
+            if client.needs_snapshot:
+                if full is None:
+                    full = json.dumps(self.full_snapshot(snapshot))
+                if self._offer(client, full):
+                    client.needs_snapshot = False
+            elif encoded is not None and not self._offer(client, encoded):
+                client.needs_snapshot = True  # It missed a delta, start it over
+
+    def _offer(self, client, message):
+        try:
+            client.messages.put_nowait(message)
+        except queue.Full:
+            client.dropped += 1
+            return False
+        self.messages_sent += 1
+        return True
+
+    def connect(self):
+        client = Client(self.max_queued)
+        with self._clients_lock:
+            self.clients.add(client)
+        return client
+
+    def disconnect(self, client):
+        with self._clients_lock:
+            self.clients.discard(client)
+
+
+class MetricsRequestHandler(BaseHTTPRequestHandler):
+    publisher = None  # Set on the subclass made by MetricsPublisher.start()
+
+    def log_message(self, format, *args):
+        pass  # Keep the collector's console output clean
+
+    def send_common_headers(self, content_type):
+        self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Cache-Control", "no-cache")
+        self.send_header("Access-Control-Allow-Origin", "*")  # index.html is opened from disk
+        self.end_headers()
+
+    def do_GET(self):
+        if self.path == "/snapshot":
+            body = json.dumps(self.publisher.full_snapshot()).encode("utf-8")
+            self.send_common_headers("application/json")
+            self.wfile.write(body)
+        elif self.path == "/events":
+            self.stream_events()
+        else:
+            self.send_error(404)
+
+    def stream_events(self):
+        self.send_common_headers("text/event-stream")
+        client = self.publisher.connect()
+        try:
+            while not self.publisher.stopped:
+                try:
+                    message = client.messages.get(timeout=KEEPALIVE_SECONDS)
+                except queue.Empty:
+                    self.wfile.write(b": keepalive\n\n")
+                    self.wfile.flush()
+                    continue
+                if message is None:
+                    break
+                self.wfile.write(f"data: {message}\n\n".encode("utf-8"))
+                self.wfile.flush()
+        except (BrokenPipeError, ConnectionResetError):
+            pass  # Dashboard closed
+        finally:
+            self.publisher.disconnect(client)
@@ -170,3 +170,59 @@ setInterval(updateActivitySummary, 2000);
 // Event Listeners for inactivity tracking
 window.addEventListener("blur", handleInactivity); // User loses focus
 window.addEventListener("focus", resetInactivity); // User regains focus
+
+// Live metrics pushed by data_collection.py (publish_metrics = True), on metrics_port
+// (8765 by default, open index.html?collector_port=<port> when it was changed)
+const COLLECTOR_PORT = new URLSearchParams(window.location.search).get("collector_port") || "8765";
+const COLLECTOR_URL = `http://127.0.0.1:${COLLECTOR_PORT}/events`;
+const collectorData = {
+    connected: false,
+    metrics: {}, // Window name -> metrics, rebuilt from the snapshot and the deltas
+    histogram: {}, // Second -> {event type: count}, last 60 seconds
+};
+
+function applyCollectorMessage(message) {
+    if (message.type === "snapshot") {
+        collectorData.metrics = message.metrics;
+        collectorData.histogram = message.histogram || {};
+    } else {
+        // Deltas only carry the fields that changed
+        for (const [window, fields] of Object.entries(message.metrics || {})) {
+            collectorData.metrics[window] = { ...collectorData.metrics[window], ...fields };
+        }
+        Object.assign(collectorData.histogram, message.histogram || {});
+    }
+    const oldest = Math.floor(message.timestamp) - 60;
+    for (const second of Object.keys(collectorData.histogram)) {
+        if (Number(second) < oldest) delete collectorData.histogram[second];
+    }
+}
+
+function updateCollectorSummary() {
+    const collectorSummaryDiv = document.getElementById("collector-summary");
+    if (!collectorSummaryDiv) return;
+    if (!collectorData.connected) {
+        collectorSummaryDiv.innerHTML = "<h3>Collector Metrics</h3><p>Collector not running.</p>";
+        return;
+    }
+    const rows = Object.entries(collectorData.metrics)
+        .map(([window, m]) => `<p>${window}: ${m.typing_speed_kpm.toFixed(1)} KPM, ${m.typing_speed_wpm.toFixed(1)} WPM, `
+            + `interval ${m.interval_mean.toFixed(3)}s, ${m.clicks_per_minute.toFixed(1)} clicks/min, `
+            + `idle ${m.idle_seconds.toFixed(1)}s</p>`)
+        .join("");
+    const seconds = Object.keys(collectorData.histogram).sort();
+    const last = seconds.length ? collectorData.histogram[seconds[seconds.length - 1]] : {};
+    const lastSecond = Object.entries(last).map(([type, count]) => `${type}: ${count}`).join(", ");
+    collectorSummaryDiv.innerHTML = `<h3>Collector Metrics</h3>${rows}<p>Last second: ${lastSecond || "no events"}</p>`;
+}
+
+if (window.EventSource) {
+    const collectorSource = new EventSource(COLLECTOR_URL); // Reconnects on its own
+    collectorSource.onopen = () => { collectorData.connected = true; };
+    collectorSource.onerror = () => { collectorData.connected = false; };
+    collectorSource.onmessage = (event) => {
+        collectorData.connected = true;
+        applyCollectorMessage(JSON.parse(event.data));
+    };
+}
+setInterval(updateCollectorSummary, 1000);
@@ -0,0 +1,128 @@
+import json
+import os
+import tempfile
+import threading
+import time
+
+DEFAULT_LEARNER = "default"
+DEFAULT_DECK = "default"
+
+
+class ProgressStore:
+    """
+    Resume state of every learner and deck, kept in one JSON file.
+    - The file holds {"learners": {learner: {deck: record}}}, a record is a plain dict
+      (current_index, score, ...).
+    - update() only changes the copy in memory. A background thread writes the file
+      `delay_ms` after the first unsaved change, so a burst of updates costs one write.
+    - Writes go to a temp file in the same directory which then replaces the old
+      file, a crash mid-write leaves the previous version intact.
+    - close() (or flush()) writes any pending change right away, call it when the window closes.
+    """
+
+    def __init__(self, path="progress.json", delay_ms=500):
+        self.path = path
+        self.delay = delay_ms / 1000
+        self.writes = 0
+        self._data = self._load()
+        self._lock = threading.Lock()
+        self._write_lock = threading.Lock()  # One write at a time, flush() can race the thread
+        self._changed = threading.Condition(self._lock)
+        self._dirty_since = None  # time.monotonic() of the first unsaved change
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, name="ProgressStore", daemon=True)
+        self._thread.start()
+
+    def _load(self):
+        if not os.path.exists(self.path):
+            return {"learners": {}}
+        try:
+            with open(self.path, "r") as file:
+                data = json.load(file)
+        except (OSError, ValueError) as e:
+            print(f"Could not read {self.path}, starting without saved progress: {e}")
+            return {"learners": {}}
+        if "learners" not in data:
+            # Single-viewer file from before the store, keep it as the default learner's default deck
+            data = {"learners": {DEFAULT_LEARNER: {DEFAULT_DECK: data}}} if data else {"learners": {}}
+        return data
+
+    def get(self, learner=DEFAULT_LEARNER, deck=DEFAULT_DECK):
+        """Copy of the saved record of `learner` on `deck`, {} if there is none."""
+        with self._lock:
+            return dict(self._data["learners"].get(learner, {}).get(deck, {}))
+
+    def update(self, learner=DEFAULT_LEARNER, deck=DEFAULT_DECK, **fields):
+        """Merge `fields` into the record of `learner` on `deck`, written out later."""
+        with self._lock:
+            record = self._data["learners"].setdefault(learner, {}).setdefault(deck, {})
+            record.update(fields)
+            if self._dirty_since is None:
+                self._dirty_since = time.monotonic()
+                self._changed.notify()
+
+    def update_item(self, learner, deck, field, key, value):
+        """Set record[field][key] = value, for large per-card fields that change one entry at a time."""
+        with self._lock:
+            record = self._data["learners"].setdefault(learner, {}).setdefault(deck, {})
+            record.setdefault(field, {})[key] = value
+            if self._dirty_since is None:
+                self._dirty_since = time.monotonic()
+                self._changed.notify()
+
+    def _run(self):
+        with self._lock:
+            while not self._closed:
+                if self._dirty_since is None:
+                    self._changed.wait()
+                    continue
+                remaining = self._dirty_since + self.delay - time.monotonic()
+                if remaining > 0:
+                    self._changed.wait(remaining)
+                    continue
+                self._lock.release()
+                try:
+                    self.flush()
+                finally:
+                    self._lock.acquire()
+
+    def flush(self):
+        """Write the pending changes now, if there are any."""
+        with self._write_lock:
+            with self._lock:
+                if self._dirty_since is None:
+                    return
+                self._dirty_since = None
+                text = json.dumps(self._data)
+            try:
+                self._write(text)
+            except OSError as e:
+                print(f"Could not save progress to {self.path}: {e}")
+                with self._lock:
+                    if self._dirty_since is None:
+                        self._dirty_since = time.monotonic()  # Try again after the next delay
+
+    def _write(self, text):
+        directory = os.path.dirname(os.path.abspath(self.path))
+        fd, temp_path = tempfile.mkstemp(prefix=".progress-", suffix=".tmp", dir=directory)
+        try:
+            with os.fdopen(fd, "w") as file:
+                file.write(text)
+                file.flush()
+                os.fsync(file.fileno())
+            os.replace(temp_path, self.path)
+        except BaseException:
+            try:
+                os.remove(temp_path)
+            except OSError:
+                pass
+            raise
+        self.writes += 1
+
+    def close(self):
+        """Stop the background thread and write what is left."""
+        with self._lock:
+            self._closed = True
+            self._changed.notify()
+        self._thread.join()
+        self.flush()
@@ -0,0 +1,174 @@
+import argparse
+import hashlib
+import json
+import sqlite3
+from functools import lru_cache
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS questions (
+    deck TEXT NOT NULL,
+    position INTEGER NOT NULL,
+    type TEXT NOT NULL,
+    topic TEXT NOT NULL DEFAULT '',
+    question TEXT NOT NULL,
+    choices TEXT,
+    correct_answer TEXT,
+    PRIMARY KEY (deck, position)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS questions_type ON questions (deck, type, position);
+CREATE INDEX IF NOT EXISTS questions_topic ON questions (deck, topic, position);
+CREATE TABLE IF NOT EXISTS deck_counts (
+    deck TEXT NOT NULL,
+    type TEXT NOT NULL,
+    count INTEGER NOT NULL,
+    PRIMARY KEY (deck, type)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS deck_sources (
+    deck TEXT PRIMARY KEY,
+    source_hash TEXT NOT NULL
+) WITHOUT ROWID;
+"""
+
+
+def row_to_question(row):
+    """Turn a questions row back into the dict format the viewer uses."""
+    q_type, topic, question, choices, correct_answer = row
+    data = {"question": question, "type": q_type}
+    if topic:
+        data["topic"] = topic
+    if choices is not None:
+        data["choices"] = json.loads(choices)
+    if correct_answer is not None:
+        data["correct_answer"] = correct_answer
+    return data
+
+
+class Deck:
+    """
+    One deck of a QuestionBank, usable like the list of question dicts it replaces.
+    - deck[i] reads a single row by primary key, recently shown cards are cached.
+    - len(deck) and type_count() come from the counts stored at import time,
+      nothing is scanned when a deck is opened.
+    """
+
+    def __init__(self, bank, name, cache_size=256):
+        self.bank = bank
+        self.name = name
+        self.counts = dict(bank.connection.execute(
+            "SELECT type, count FROM deck_counts WHERE deck = ?", (name,)
+        ).fetchall())
+        self.total = sum(self.counts.values())
+        self._load = lru_cache(maxsize=cache_size)(self._load_question)
+
+    def __len__(self):
+        return self.total
+
+    def __getitem__(self, index):
+        if index < 0:
+            index += self.total
+        if not 0 <= index < self.total:
+            raise IndexError("question index out of range")
+        return self._load(index)
+
+    def _load_question(self, index):
+        row = self.bank.connection.execute(
+            "SELECT type, topic, question, choices, correct_answer FROM questions WHERE deck = ? AND position = ?",
+            (self.name, index),
+        ).fetchone()
+        return row_to_question(row)
+
+    def type_count(self, q_type):
+        return self.counts.get(q_type, 0)
+
+    def positions(self, q_type=None, topic=None):
+        """Positions of the questions of a type and/or topic, in deck order, through the indexes."""
+        conditions, params = ["deck = ?"], [self.name]
+        if q_type is not None:
+            conditions.append("type = ?")
+            params.append(q_type)
+        if topic is not None:
+            conditions.append("topic = ?")
+            params.append(topic)
+        query = f"SELECT position FROM questions WHERE {' AND '.join(conditions)} ORDER BY position"
+        return [position for (position,) in self.bank.connection.execute(query, params)]
+
+    def topics(self):
+        return [topic for (topic,) in self.bank.connection.execute(
+            "SELECT DISTINCT topic FROM questions WHERE deck = ? ORDER BY topic", (self.name,)
+        )]
+
+
+def questions_hash(questions):
+    """Hash of a list of question dicts, changes whenever any question is edited, added or removed."""
+    return hashlib.sha256(json.dumps(questions, sort_keys=True).encode("utf-8")).hexdigest()
+
+
+class QuestionBank:
+    """
+    SQLite file holding any number of decks of flashcard questions.
+    Questions are indexed by deck position, type and topic, and the per-type
+    counts of each deck are stored when it is imported.
+    """
+
+    def __init__(self, path="questions.db"):
+        self.path = path
+        self.connection = sqlite3.connect(path)
+        self.connection.executescript(SCHEMA)
+
+    def decks(self):
+        return [deck for (deck,) in self.connection.execute("SELECT DISTINCT deck FROM deck_counts ORDER BY deck")]
+
+    def deck(self, name="default"):
+        return Deck(self, name)
+
+    def sync_deck(self, name, questions):
+        """Import `questions` as deck `name` unless the deck was imported from the same list, returns True if it was."""
+        row = self.connection.execute("SELECT source_hash FROM deck_sources WHERE deck = ?", (name,)).fetchone()
+        if row is not None and row[0] == questions_hash(questions):
+            return False
+        self.import_deck(name, questions)
+        return True
+
+    def import_deck(self, name, questions):
+        """Replace deck `name` with the question dicts in `questions`."""
+        counts = {}
+        rows = []
+        for position, data in enumerate(questions):
+            q_type = data["type"]
+            counts[q_type] = counts.get(q_type, 0) + 1
+            choices = data.get("choices")
+            rows.append((
+                name, position, q_type, data.get("topic", ""), data["question"],
+                json.dumps(choices) if choices is not None else None, data.get("correct_answer"),
+            ))
+        with self.connection:
+            self.connection.execute("DELETE FROM questions WHERE deck = ?", (name,))
+            self.connection.execute("DELETE FROM deck_counts WHERE deck = ?", (name,))
+            self.connection.executemany("INSERT INTO questions VALUES (?, ?, ?, ?, ?, ?, ?)", rows)
+            self.connection.executemany(
+                "INSERT INTO deck_counts VALUES (?, ?, ?)", [(name, q_type, count) for q_type, count in counts.items()]
+            )
+            self.connection.execute(
+                "INSERT OR REPLACE INTO deck_sources VALUES (?, ?)", (name, questions_hash(questions))
+            )
+        return len(rows)
+
+    def close(self):
+        self.connection.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Import a JSON list of flashcard questions into a question bank.")
+    parser.add_argument("questions", help="JSON file with a list of question dicts")
+    parser.add_argument("--deck", default="default", help="Deck name (replaced if it exists)")
+    parser.add_argument("--db", default="questions.db", help="Question bank file")
+    args = parser.parse_args()
+
+    with open(args.questions, "r") as file:
+        questions = json.load(file)
+    bank = QuestionBank(args.db)
+    count = bank.import_deck(args.deck, questions)
+    deck = bank.deck(args.deck)
+    print(f"Imported {count} questions into deck '{args.deck}' of {args.db}: "
+          + ", ".join(f"{q_type} {number}" for q_type, number in sorted(deck.counts.items())))
+    bank.close()
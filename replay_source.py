@@ -0,0 +1,109 @@
+import random
+import threading
+import time
+from collections import namedtuple
+
+# Stands in for a pynput KeyCode, KeyNormalizer resolves it through `char` like a typed key
+ReplayKey = namedtuple("ReplayKey", ["char", "vk"])
+
+SYNTHETIC_KEYS = list("etaoinshrdlu") + ["SPACE", "BACKSPACE", "ENTER", "\x03", "\x16"]
+
+
+class ReplaySource:
+    """
+    Event source that feeds a fixed stream of events to the Collector callbacks from its own thread.
+    - `events` is a list of ('keystroke', key), ('mouse_move', x, y) or
+      ('mouse_click', x, y, button) tuples.
+    - Events are sent `rate` per second, or with the recorded `delays` (seconds before
+      each event) when no rate is given. Events that fall behind schedule are sent
+      right away, `max_behind` is the worst delay seen.
+    - Same input, same calls in the same order: runs are repeatable.
+    """
+
+    def __init__(self, events, rate=None, delays=None):
+        if rate is None and delays is None:
+            raise ValueError("ReplaySource needs a rate or the recorded delays")
+        self.events = events
+        self.rate = rate
+        self.delays = delays
+        self.sent = 0
+        self.max_behind = 0.0
+        self.elapsed = 0.0
+        self._stop_event = threading.Event()
+        self._thread = None
+
+    @classmethod
+    def synthetic(cls, n_events, rate, seed=0):
+        """Generated stream: mostly mouse moves along a random walk, keystrokes and a few clicks."""
+        rng = random.Random(seed)
+        x, y = 800, 500
+        events = []
+        for _ in range(n_events):
+            draw = rng.random()
+            if draw < 0.7:
+                x = min(max(x + rng.randint(-8, 8), 0), 1919)
+                y = min(max(y + rng.randint(-8, 8), 0), 1079)
+                events.append(('mouse_move', x, y))
+            elif draw < 0.97:
+                events.append(('keystroke', ReplayKey(rng.choice(SYNTHETIC_KEYS), None)))
+            else:
+                events.append(('mouse_click', x, y, rng.choice(["Button.left", "Button.left", "Button.right"])))
+        return cls(events, rate=rate)
+
+    @classmethod
+    def from_session(cls, path, speed=1.0, rate=None):
+        """Replay a recorded CSV log or Parquet session, at `speed` times the recorded pace or at a fixed `rate`."""
+        from session_format import load_events
+
+        data = load_events(path, ['timestamp', 'event_type', 'key', 'x', 'y', 'button']).sort_values('timestamp')
+        events = []
+        for row in data.itertuples(index=False):
+            if row.event_type == 'keystroke':
+                events.append(('keystroke', ReplayKey(row.key, None)))
+            elif row.event_type == 'mouse_move':
+                events.append(('mouse_move', int(row.x), int(row.y)))
+            elif row.event_type == 'mouse_click':
+                events.append(('mouse_click', int(row.x), int(row.y), row.button))
+        timestamps = data['timestamp'].to_numpy(dtype=float)
+        delays = [0.0] + ((timestamps[1:] - timestamps[:-1]) / speed).tolist() if len(timestamps) else []
+        return cls(events, rate=rate, delays=None if rate else delays)
+
+    def start(self, on_press, on_move, on_click):
+        callbacks = (on_press, on_move, on_click)
+        self._thread = threading.Thread(target=self._run, args=callbacks, name="ReplaySource", daemon=True)
+        self._thread.start()
+
+    def _run(self, on_press, on_move, on_click):
+        started = time.perf_counter()
+        due = 0.0  # Seconds from the start when the next event is due
+        step = 1 / self.rate if self.rate else None
+        for number, event in enumerate(self.events):
+            due += step if step else self.delays[number]
+            wait = due - (time.perf_counter() - started)
+            if wait > 0.0005:
+                if self._stop_event.wait(wait):
+                    break
+            elif self._stop_event.is_set():
+                break
+            else:
+                self.max_behind = max(self.max_behind, -wait)
+
+            kind = event[0]
+            if kind == 'mouse_move':
+                on_move(event[1], event[2])
+            elif kind == 'keystroke':
+                on_press(event[1])
+            else:
+                on_click(event[1], event[2], event[3], True)
+                on_click(event[1], event[2], event[3], False)
+            self.sent += 1
+        self.elapsed = time.perf_counter() - started
+
+    def wait(self, timeout=None):
+        """Block until every event was sent."""
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def stop(self):
+        self._stop_event.set()
+        self.wait()
@@ -0,0 +1,151 @@
+import csv
+import glob
+import json
+import os
+import pandas as pd
+from event_store import COLUMNS
+
+# Binary session files are Parquet, pyarrow is only needed when they are used
+METRICS_KEY = b'session_metrics'
+CATEGORICAL_COLUMNS = ('event_type', 'key', 'button')
+# Read back as float64 like a CSV log, Arrow gives ints for a batch without nulls and floats otherwise
+FLOAT_COLUMNS = ('interval', 'x', 'y')
+
+
+def require_pyarrow():
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError as e:
+        raise ImportError("The binary session format needs pyarrow (pip install pyarrow)") from e
+    return pa, pq
+
+
+def session_schema(metrics=None):
+    """Typed schema of the event table, metrics are stored as JSON in the metadata."""
+    pa, _ = require_pyarrow()
+    schema = pa.schema([
+        ('timestamp', pa.float64()),
+        ('event_type', pa.dictionary(pa.int8(), pa.string())),
+        ('key', pa.dictionary(pa.int16(), pa.string())),
+        ('interval', pa.float64()),
+        ('x', pa.int16()),
+        ('y', pa.int16()),
+        ('button', pa.dictionary(pa.int8(), pa.string())),
+    ])
+    if metrics is not None:
+        schema = schema.with_metadata({METRICS_KEY: json.dumps(metrics, default=str)})
+    return schema
+
+
+def events_to_table(events, metrics=None):
+    """Convert an event DataFrame (COLUMNS layout) to an Arrow table with the session schema."""
+    pa, _ = require_pyarrow()
+    events = events.reindex(columns=COLUMNS)
+    schema = session_schema(metrics)
+    arrays = []
+    for field in schema:
+        column = events[field.name]
+        if field.name in CATEGORICAL_COLUMNS:
+            values = column.astype(object).where(column.notna(), None)
+            array = pa.array(values, type=pa.string()).dictionary_encode().cast(field.type)
+        elif field.name in ('x', 'y'):
+            array = pa.array(column.round(), type=field.type, from_pandas=True)
+        else:
+            array = pa.array(column, type=field.type, from_pandas=True)
+        arrays.append(array)
+    return pa.Table.from_arrays(arrays, schema=schema)
+
+
+def write_session(path, events, metrics=None):
+    """Write events (and optionally the session metrics) to a compressed Parquet file."""
+    _, pq = require_pyarrow()
+    pq.write_table(events_to_table(events, metrics), path, compression='zstd')
+
+
+def table_to_events(table):
+    """Event DataFrame of an Arrow table or record batch, numeric columns as float64 whatever the nulls."""
+    events = table.to_pandas()
+    for name in FLOAT_COLUMNS:
+        if name in events:
+            events[name] = events[name].astype('float64')
+    return events
+
+
+def read_session(path, columns=None):
+    """Read the event table of a Parquet session, optionally only some columns."""
+    _, pq = require_pyarrow()
+    return table_to_events(pq.read_table(path, columns=columns, memory_map=True))
+
+
+def read_session_metrics(path):
+    """Read the session metrics from the file metadata without loading any events."""
+    _, pq = require_pyarrow()
+    metadata = pq.read_schema(path, memory_map=True).metadata or {}
+    return json.loads(metadata[METRICS_KEY]) if METRICS_KEY in metadata else {}
+
+
+def read_csv_log(path, columns=None):
+    """
+    Read a CSV activity log, returning (metrics, events).
+    Handles both the layout with a Metric/Value block on top and a plain event table.
+    """
+    metrics = {}
+    with open(path, newline='') as f:
+        first_line = f.readline()
+        if first_line.strip() == 'Metric,Value':
+            for row in csv.reader(iter(f.readline, '')):
+                if not row:
+                    break  # Blank line separates the metrics from the events
+                metrics[row[0]] = row[1]
+        else:
+            f.seek(0)
+        events = pd.read_csv(f, usecols=columns)
+    return metrics, events
+
+
+def iter_events(path, chunksize, columns=None):
+    """Yield the event table of a Parquet session or CSV activity log in DataFrames of `chunksize` rows."""
+    if str(path).endswith('.parquet'):
+        _, pq = require_pyarrow()
+        for batch in pq.ParquetFile(path, memory_map=True).iter_batches(batch_size=chunksize, columns=columns):
+            yield table_to_events(batch)
+        return
+
+    with open(path, newline='') as f:
+        if f.readline().strip() == 'Metric,Value':
+            for line in iter(f.readline, ''):
+                if not line.strip():
+                    break  # Events start after the blank line
+        else:
+            f.seek(0)
+        yield from pd.read_csv(f, usecols=columns, chunksize=chunksize)
+
+
+def segment_files(directory):
+    """Event segments of a session streamed by SessionWriter, in order (none for other directories)."""
+    return sorted(glob.glob(os.path.join(directory, "events_*.csv")) + glob.glob(os.path.join(directory, "events_*.parquet")))
+
+
+def session_files(path):
+    """Event files of a session: the file itself, or the segments of a streamed session directory."""
+    return segment_files(path) if os.path.isdir(path) else [path]
+
+
+def load_events(path, columns=None):
+    """Load the event table from a Parquet session or a CSV activity log."""
+    if str(path).endswith('.parquet'):
+        return read_session(path, columns)
+    return read_csv_log(path, columns)[1]
+
+
+def export_csv(session_path, csv_path):
+    """Export a Parquet session to the CSV layout written by save_data_to_csv()."""
+    metrics = read_session_metrics(session_path)
+    events = read_session(session_path)
+    with open(csv_path, mode='w', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(['Metric', 'Value'])
+        writer.writerows([key, value] for key, value in metrics.items())
+        f.write('\n')
+        events.to_csv(f, index=False)
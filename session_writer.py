@@ -0,0 +1,163 @@
+import csv
+import os
+import threading
+import time
+import pandas as pd
+from event_store import COLUMNS
+from session_format import events_to_table, session_schema, require_pyarrow
+
+# Default segment age limit (seconds) per format. A Parquet segment is only readable once its
+# footer is written on close, so it rotates often: a crash loses at most this much capture
+SEGMENT_SECONDS = {'csv': 600, 'parquet': 10}
+
+
+class SessionWriter(threading.Thread):
+    """
+    Background thread that drains EventStores to disk while capture runs.
+    - A batch is written every `batch_size` pending events or every
+      `flush_interval_ms` milliseconds, whichever comes first.
+    - Events are appended to numbered segments in `directory`, a new
+      segment is started once the current one reaches `max_segment_bytes`
+      or is `max_segment_seconds` old (SEGMENT_SECONDS by default).
+    - `segment_format` is 'csv' or 'parquet' (one row group per batch).
+      On a crash a CSV session loses at most the last batch. A Parquet
+      segment is only readable once it has been closed, so up to
+      `max_segment_seconds` of events can be lost (10 s by default).
+    - finalize() flushes what is left and writes the metrics to a separate
+      summary file. Metrics built from event_counts/mean_interval() must be
+      computed after stop(), or passed to finalize() as a function.
+    """
+
+    def __init__(self, stores, directory="user_activity_log", batch_size=1000, flush_interval_ms=500,
+                 max_segment_bytes=16 * 1024 * 1024, max_segment_seconds=None, segment_format='csv'):
+        super().__init__(name="SessionWriter", daemon=True)
+        self.stores = stores
+        self.directory = directory
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval_ms / 1000
+        self.max_segment_bytes = max_segment_bytes
+        self.segment_format = segment_format
+        if segment_format == 'parquet':
+            require_pyarrow()
+        elif segment_format != 'csv':
+            raise ValueError(f"Unknown segment format: {segment_format}")
+        self.max_segment_seconds = max_segment_seconds or SEGMENT_SECONDS[segment_format]
+
+        # Running totals, the rows themselves are released once written
+        self.event_counts = {store.event_type: 0 for store in stores}
+        self.interval_sums = {store.event_type: 0.0 for store in stores}
+        self.rows_written = 0
+        self.batches_written = 0
+        self.write_seconds = 0.0  # Time spent draining and writing batches
+        self.segments = []
+
+        self._stop_event = threading.Event()
+        self._segment_file = None
+        self._parquet_writer = None
+        self._segment_started = 0.0
+
+    def start(self):
+        # Created here rather than in __init__, a writer that never runs leaves nothing on disk
+        os.makedirs(self.directory, exist_ok=True)
+        super().start()
+
+    def pending(self):
+        return sum(len(store) for store in self.stores)
+
+    def run(self):
+        poll = min(self.flush_interval, 0.05)
+        last_flush = time.monotonic()
+        while not self._stop_event.wait(poll):
+            now = time.monotonic()
+            if self.pending() >= self.batch_size or now - last_flush >= self.flush_interval:
+                self.flush()
+                last_flush = now
+            if self._segment_file is not None and now - self._segment_started >= self.max_segment_seconds:
+                self._close_segment()  # Also when idle, so an open Parquet segment doesn't stay unreadable
+
+    def flush(self):
+        """Drain every store and append the events to the current segment."""
+        started = time.perf_counter()
+        frames = []
+        for store in self.stores:
+            arrays = store.drain()
+            rows = len(arrays['timestamp'])
+            if not rows:
+                continue
+            self.event_counts[store.event_type] += rows
+            if 'interval' in arrays:
+                self.interval_sums[store.event_type] += float(arrays['interval'].sum())
+            frames.append(store.arrays_to_dataframe(arrays))
+        if not frames:
+            return
+
+        batch = pd.concat(frames, ignore_index=True).reindex(columns=COLUMNS)
+        batch = batch.sort_values('timestamp', kind='mergesort')
+
+        f = self._current_segment()
+        if self._parquet_writer is not None:
+            self._parquet_writer.write_table(events_to_table(batch))
+        else:
+            batch.to_csv(f, index=False, header=False)
+        f.flush()
+        self.rows_written += len(batch)
+        self.batches_written += 1
+        self.write_seconds += time.perf_counter() - started
+
+    def _current_segment(self):
+        f = self._segment_file
+        if f is not None:
+            too_big = f.tell() >= self.max_segment_bytes
+            too_old = time.monotonic() - self._segment_started >= self.max_segment_seconds
+            if not (too_big or too_old):
+                return f
+            self._close_segment()
+
+        path = os.path.join(self.directory, f"events_{len(self.segments):05d}.{self.segment_format}")
+        if self.segment_format == 'parquet':
+            _, pq = require_pyarrow()
+            f = open(path, mode='wb')
+            self._parquet_writer = pq.ParquetWriter(f, session_schema(), compression='zstd')
+        else:
+            f = open(path, mode='w', newline='')
+            csv.writer(f).writerow(COLUMNS)
+        self.segments.append(path)
+        self._segment_file = f
+        self._segment_started = time.monotonic()
+        return f
+
+    def _close_segment(self):
+        if self._parquet_writer is not None:
+            self._parquet_writer.close()  # Writes the Parquet footer
+            self._parquet_writer = None
+        if self._segment_file is not None:
+            self._segment_file.close()
+            self._segment_file = None
+
+    def mean_interval(self, event_type):
+        count = self.event_counts.get(event_type, 0)
+        return self.interval_sums[event_type] / count if count else 0
+
+    def stop(self):
+        """Stop the thread and write out the remaining events."""
+        self._stop_event.set()
+        if self.is_alive():
+            self.join()
+        self.flush()
+        self._close_segment()
+
+    def finalize(self, metrics, summary_name="summary.csv"):
+        """
+        Stop writing and save the session metrics next to the segments.
+        `metrics` is a dict, or a function returning one that is called after the
+        last flush, so counts read from the writer include every event.
+        """
+        self.stop()
+        if callable(metrics):
+            metrics = metrics()
+        path = os.path.join(self.directory, summary_name)
+        with open(path, mode='w', newline='') as f:
+            writer = csv.writer(f)
+            writer.writerow(['Metric', 'Value'])
+            writer.writerows([key, value] for key, value in metrics.items())
+        return path
@@ -0,0 +1,99 @@
+import heapq
+import time
+import numpy as np
+
+DAY = 86400
+RELEARN_SECONDS = 60  # A failed card comes back after this long
+MIN_EASE = 1.3
+
+
+class SpacedRepetitionScheduler:
+    """
+    SM-2 style schedule of one deck, choosing the card to show next.
+    - Per-card state (due time, ease, interval in days, successful reviews in a row)
+      lives in NumPy arrays indexed by deck position, a few bytes per card.
+    - Reviewed cards sit in a heap keyed by due time, next_card() and review() are
+      O(log n). An entry whose card was reviewed again is stale and skipped lazily.
+    - Cards never seen are introduced in deck order once nothing is due.
+    - Only reviewed cards are saved: `cards` maps str(position) -> [due, ease, interval, reps],
+      `next_new` is the first card not introduced yet.
+    """
+
+    def __init__(self, total, cards=None, next_new=0):
+        self.total = total
+        self.due = np.full(total, np.inf)
+        self.ease = np.full(total, 2.5, dtype=np.float32)
+        self.interval = np.zeros(total, dtype=np.float32)
+        self.reps = np.zeros(total, dtype=np.int16)
+        self.next_new = min(next_new, total)
+        self.heap = []
+        self.reviewed = 0  # Cards with a due time
+        for key, (due, ease, interval, reps) in (cards or {}).items():
+            position = int(key)
+            if position < total:
+                self.due[position] = due
+                self.ease[position] = ease
+                self.interval[position] = interval
+                self.reps[position] = reps
+                self.heap.append((due, position))
+                self.reviewed += 1
+        heapq.heapify(self.heap)
+
+    def _peek(self):
+        """Earliest (due, position) in the heap, after dropping stale entries."""
+        heap = self.heap
+        while heap and heap[0][0] != self.due[heap[0][1]]:
+            heapq.heappop(heap)
+        return heap[0] if heap else None
+
+    def next_card(self, now=None):
+        """Position of the card to show now, None if nothing is due and every card was introduced."""
+        now = time.time() if now is None else now
+        top = self._peek()
+        if top is not None and top[0] <= now:
+            return top[1]
+        if self.next_new < self.total:
+            return self.next_new
+        return None
+
+    def next_due(self):
+        """Time the next reviewed card is due, None if no card was reviewed."""
+        top = self._peek()
+        return top[0] if top is not None else None
+
+    def review(self, position, quality, now=None):
+        """
+        Record an answer to card `position`, `quality` goes from 0 (blank) to 5 (perfect),
+        below 3 counts as forgotten. Returns the saved state of the card.
+        """
+        now = time.time() if now is None else now
+        ease = float(self.ease[position])
+        if quality < 3:
+            reps, interval = 0, 0.0
+            due = now + RELEARN_SECONDS
+        else:
+            reps = int(self.reps[position]) + 1
+            if reps == 1:
+                interval = 1.0
+            elif reps == 2:
+                interval = 6.0
+            else:
+                interval = float(self.interval[position]) * ease
+            due = now + interval * DAY
+        ease = max(MIN_EASE, ease + 0.1 - (5 - quality) * (0.08 + (5 - quality) * 0.02))
+
+        if not np.isfinite(self.due[position]):
+            self.reviewed += 1
+        self.due[position] = due
+        self.ease[position] = ease
+        self.interval[position] = interval
+        self.reps[position] = reps
+        heapq.heappush(self.heap, (due, position))
+        if position == self.next_new:
+            self.next_new += 1
+        if len(self.heap) > 2 * self.reviewed + 64:
+            # Too many stale entries, rebuild from the live ones
+            positions = np.flatnonzero(np.isfinite(self.due))
+            self.heap = list(zip(self.due[positions].tolist(), positions.tolist()))
+            heapq.heapify(self.heap)
+        return [due, ease, interval, reps]
@@ -0,0 +1,97 @@
+import builtins
+import sys
+import time
+
+# Time-to-first-window budget checked by --profile-startup
+STARTUP_BUDGET_MS = 1500
+
+
+class StartupProfiler:
+    """
+    Records how long the app spends importing modules and building the UI.
+    - start() wraps __import__ and times every module imported for the first time,
+      including submodules loaded by `from pkg import sub` (cumulative and self time,
+      like python -X importtime). Imports that fail are not recorded.
+    - mark(name) ends a UI construction phase, timed from the previous mark.
+    - first_window() is called once the window is drawn and prints the report.
+    Everything is a no-op until start() is called.
+    """
+
+    def __init__(self):
+        self.enabled = False
+        self.origin = time.perf_counter()
+        self.imports = []  # (module, cumulative seconds, self seconds, depth)
+        self.phases = []  # (name, seconds)
+        self._stack = []
+        self._original_import = None
+        self._last_mark = None
+
+    def start(self):
+        if self.enabled:
+            return
+        self.enabled = True
+        self._last_mark = time.perf_counter()
+        self._original_import = builtins.__import__
+        builtins.__import__ = self._timed_import
+
+    def stop(self):
+        if self.enabled:
+            builtins.__import__ = self._original_import
+            self.enabled = False
+
+    def _timed_import(self, name, globals=None, locals=None, fromlist=(), level=0):
+        if level:
+            return self._original_import(name, globals, locals, fromlist, level)
+        # `from pkg import sub` loads pkg.sub even when pkg is already imported
+        candidates = [name] + [f"{name}.{item}" for item in fromlist or () if item != '*']
+        candidates = [module for module in candidates if module not in sys.modules]
+        if not candidates:
+            return self._original_import(name, globals, locals, fromlist, level)
+        depth = len(self._stack)
+        self._stack.append(0.0)
+        started = time.perf_counter()
+        try:
+            module = self._original_import(name, globals, locals, fromlist, level)
+        except BaseException:
+            self._stack.pop()  # Failed probes (optional or platform-specific modules) are not recorded
+            raise
+        elapsed = time.perf_counter() - started
+        children = self._stack.pop()
+        loaded = [module_name for module_name in candidates if module_name in sys.modules]
+        if loaded:  # Nothing new when the fromlist only named attributes
+            if self._stack:
+                self._stack[-1] += elapsed
+            self.imports.append((", ".join(loaded), elapsed, elapsed - children, depth))
+        return module
+
+    def mark(self, name):
+        """Record the phase `name` as everything since the previous mark (or since start())."""
+        if not self.enabled:
+            return
+        now = time.perf_counter()
+        self.phases.append((name, now - self._last_mark))
+        self._last_mark = now
+
+    def first_window(self, budget_ms=STARTUP_BUDGET_MS, top=15):
+        """Print the report, returns True if time to first window is within the budget."""
+        self.mark("draw first window")
+        total_ms = (time.perf_counter() - self.origin) * 1000
+        self.stop()
+
+        print("Slowest imports (cumulative / self ms):")
+        top_level = sorted((entry for entry in self.imports if entry[3] == 0), key=lambda entry: -entry[1])
+        for name, cumulative, own, _ in top_level[:top]:
+            print(f"  {name:<32} {cumulative * 1000:8.1f} {own * 1000:8.1f}")
+        import_ms = sum(entry[1] for entry in top_level) * 1000
+        print(f"  {'all imports':<32} {import_ms:8.1f}")
+
+        print("UI phases (ms):")
+        for name, seconds in self.phases:
+            print(f"  {name:<32} {seconds * 1000:8.1f}")
+
+        within_budget = total_ms <= budget_ms
+        print(f"Time to first window: {total_ms:.1f} ms (budget {budget_ms} ms{'' if within_budget else ', OVER BUDGET'})")
+        return within_budget
+
+
+profiler = StartupProfiler()
@@ -0,0 +1,382 @@
+import queue
+import threading
+from bisect import bisect_right
+from collections import namedtuple
+from itertools import accumulate
+
+# Pygments is imported on first use, it is one of the slowest imports at startup
+
+TAGS = ("Keyword", "String", "Comment", "Default")
+
+# Result of one highlighting pass: lines start..stop-1 get the (tag, start_offset, end_offset) spans,
+# offsets count characters from the start of the buffer. lines/states are kept for the next pass.
+HighlightPass = namedtuple("HighlightPass", ["start", "stop", "spans", "lines", "states"])
+
+
+def lex_with_states(lexer, text, stack=("root",)):
+    """
+    Same loop as RegexLexer.get_tokens_unprocessed, but also reports the lexer state.
+    Yields (index, token, value, state): state is the state stack (a tuple) for a token
+    that starts a match at the beginning of a line, None for every other token.
+    """
+    from pygments.token import Error, Token, Whitespace
+
+    pos = 0
+    tokendefs = lexer._tokens
+    statestack = list(stack)
+    statetokens = tokendefs[statestack[-1]]
+    while True:
+        for rexmatch, action, new_state in statetokens:
+            m = rexmatch(text, pos)
+            if m:
+                state = tuple(statestack) if pos == 0 or text[pos - 1] == "\n" else None
+                if action is not None:
+                    if type(action) is type(Token):
+                        yield pos, action, m.group(), state
+                    else:
+                        for index, token, value in action(lexer, m):
+                            yield index, token, value, state if index == pos else None
+                pos = m.end()
+                if new_state is not None:
+                    if isinstance(new_state, tuple):
+                        for name in new_state:
+                            if name == "#pop":
+                                if len(statestack) > 1:
+                                    statestack.pop()
+                            elif name == "#push":
+                                statestack.append(statestack[-1])
+                            else:
+                                statestack.append(name)
+                    elif isinstance(new_state, int):
+                        if abs(new_state) >= len(statestack):
+                            del statestack[1:]
+                        else:
+                            del statestack[new_state:]
+                    elif new_state == "#push":
+                        statestack.append(statestack[-1])
+                    statetokens = tokendefs[statestack[-1]]
+                break
+        else:
+            if pos >= len(text):
+                break
+            if text[pos] == "\n":
+                # At EOL with nothing matching, reset to "root" like Pygments does
+                state = tuple(statestack) if pos == 0 or text[pos - 1] == "\n" else None
+                statestack = ["root"]
+                statetokens = tokendefs["root"]
+                yield pos, Whitespace, "\n", state
+            else:
+                yield pos, Error, text[pos], None
+            pos += 1
+
+
+class SyntaxHighlighter:
+    """
+    Incremental Pygments highlighting for a tk.Text widget.
+    The lexer state at the start of every line is kept from the previous pass,
+    so only the lines that changed are re-lexed: lexing resumes at the first
+    changed line with its saved state (backing up when a line starts in the
+    middle of a token, e.g. inside a multi-line string) and stops as soon as
+    it reaches an unchanged line in the same state as before.
+    """
+
+    def __init__(self, editor, lexer=None):
+        self.editor = editor
+        self._lexer = lexer  # Created on the first pass and reused for every pass
+        self.lines = None  # Text of each line at the last pass
+        self.line_states = []  # Lexer state at the start of each line, None if it starts inside a token
+        self._tag_cache = {}
+
+    @property
+    def lexer(self):
+        if self._lexer is None:
+            from pygments.lexers import PythonLexer
+            self._lexer = PythonLexer()
+        return self._lexer
+
+    def tag_for(self, token):
+        """Map a Pygments token type to one of the editor tags."""
+        tag = self._tag_cache.get(token)
+        if tag is None:
+            from pygments.token import Token
+            if token in Token.Keyword:
+                tag = "Keyword"
+            elif token in Token.Literal.String:
+                tag = "String"
+            elif token in Token.Comment:
+                tag = "Comment"
+            else:
+                tag = "Default"
+            self._tag_cache[token] = tag
+        return tag
+
+    def previous_pass(self):
+        """(lines, states) of the last applied pass, read together on the main thread for relex()."""
+        return self.lines, self.line_states
+
+    def relex(self, lines, previous=None):
+        """
+        Work out what has to be re-tagged for the new `lines`, compared with `previous`,
+        a (lines, states) pair from previous_pass() (the last applied pass by default,
+        (None, []) for a full pass). Returns a HighlightPass, or None when nothing changed.
+        Nothing is read or stored on the highlighter besides the lexer, so with
+        `previous` given this can run off the main thread.
+        """
+        old, old_states = previous if previous is not None else self.previous_pass()
+        if old is None:
+            first_changed, changed_end, states = 0, len(lines), [None] * len(lines)
+        else:
+            n_old, n_new = len(old), len(lines)
+            limit = min(n_old, n_new)
+            first_changed = 0
+            while first_changed < limit and old[first_changed] == lines[first_changed]:
+                first_changed += 1
+            if first_changed == n_old == n_new:
+                return None
+            same_tail = 0
+            while same_tail < limit - first_changed and old[n_old - 1 - same_tail] == lines[n_new - 1 - same_tail]:
+                same_tail += 1
+            changed_end = n_new - same_tail
+            # States of the unchanged tail shift along with the lines
+            states = (
+                old_states[:first_changed]
+                + [None] * (changed_end - first_changed)
+                + old_states[n_old - same_tail:]
+            )
+
+        # Resume from the nearest line with a known state
+        start = min(first_changed, len(lines) - 1)
+        while start > 0 and states[start] is None:
+            start -= 1
+        new_states = list(states)
+        new_states[start] = None
+
+        spans = []
+        stop = len(lines)
+        base = sum(map(len, lines[:start])) + start  # Buffer offset of the first re-lexed line
+        line, col = start, 0
+        tag_for = self.tag_for
+        text = "\n".join(lines[start:])
+        for index, token, value, state in lex_with_states(self.lexer, text, states[start] or ("root",)):
+            if col == 0 and state is not None:
+                # Back in sync with the previous pass: the rest of the tags are still valid
+                if line >= changed_end and line > start and state == states[line]:
+                    stop = line
+                    break
+                new_states[line] = state
+
+            newlines = value.count("\n")
+            if newlines:
+                for inner in range(line + 1, line + newlines + 1):
+                    new_states[inner] = None
+                line += newlines
+                col = len(value) - value.rfind("\n") - 1
+            else:
+                col += len(value)
+            spans.append((tag_for(token), base + index, base + index + len(value)))
+
+        return HighlightPass(start, stop, spans, lines, new_states)
+
+    def update(self, event=None):
+        """Re-highlight the part of the editor that changed since the last pass."""
+        result = self.relex(self.editor.get("1.0", "end-1c").split("\n"))
+        if result is not None:
+            self.apply(result)
+
+    def highlight_all(self):
+        """Forget the previous pass and re-highlight the whole buffer."""
+        self.lines = None
+        self.line_states = []
+        self.update()
+
+    def apply(self, result):
+        """
+        Store the pass and re-tag its lines, must run on the Tk main thread.
+        Ranges are grouped per tag so the whole pass costs one tag_remove and one
+        multi-range tag_add Tcl call per tag, whatever the number of tokens.
+        """
+        self.lines = result.lines
+        self.line_states = result.states
+
+        # Merge touching ranges of the same tag, offsets only
+        ranges = {tag: [] for tag in TAGS}
+        for tag, start_offset, end_offset in result.spans:
+            tag_ranges = ranges[tag]
+            if tag_ranges and tag_ranges[-1] == start_offset:
+                tag_ranges[-1] = end_offset
+            else:
+                tag_ranges.append(start_offset)
+                tag_ranges.append(end_offset)
+
+        # Offsets of the re-tagged lines, to turn offsets into line.col indices without asking Tk
+        start = result.start
+        base = sum(map(len, result.lines[:start])) + start
+        line_starts = list(accumulate((len(line) + 1 for line in result.lines[start:result.stop]), initial=base))
+
+        def index(offset):
+            row = bisect_right(line_starts, offset) - 1
+            return f"{start + row + 1}.{offset - line_starts[row]}"
+
+        editor = self.editor
+        range_start, range_end = f"{start + 1}.0", f"{result.stop + 1}.0"
+        for tag in TAGS:
+            editor.tag_remove(tag, range_start, range_end)
+            if ranges[tag]:
+                editor.tag_add(tag, *map(index, ranges[tag]))
+
+
+class HighlightScheduler:
+    """
+    Runs a SyntaxHighlighter off the Tk main thread.
+    - Bursts of key releases are debounced into one pass `delay_ms` after the last one.
+    - The pass is lexed on a worker thread, the main loop polls for the result with
+      after() and applies all its spans in one go.
+    - A result is dropped if the buffer changed while it was being computed.
+    - The previous pass is read on the main thread and sent along with each job,
+      the worker never reads state that apply() or highlight_all() may be changing.
+    """
+
+    def __init__(self, highlighter, delay_ms=50, poll_ms=10):
+        self.highlighter = highlighter
+        self.editor = highlighter.editor
+        self.delay_ms = delay_ms
+        self.poll_ms = poll_ms
+        self.generation = 0  # Bumped on every change, a result from an older generation is stale
+        self.dropped = 0
+        self._after_id = None
+        self._running = False
+        self._full_pass = False  # Set by highlight_all() until a full pass has been applied
+        self._jobs = queue.Queue()
+        self._results = queue.Queue()
+        threading.Thread(target=self._worker, name="HighlightWorker", daemon=True).start()
+
+    def schedule(self, event=None):
+        """Request a pass, e.g. from <KeyRelease>."""
+        self.generation += 1
+        if self._after_id is not None:
+            self.editor.after_cancel(self._after_id)
+        self._after_id = self.editor.after(self.delay_ms, self._start_job)
+
+    def highlight_all(self):
+        """Re-highlight the whole buffer (new file, new theme) on the worker, dropping any pass in flight."""
+        self.generation += 1
+        self._full_pass = True
+        if self._after_id is not None:
+            self.editor.after_cancel(self._after_id)
+            self._after_id = None
+        self._start_job()
+
+    def stop(self):
+        """Cancel pending passes and end the worker thread."""
+        if self._after_id is not None:
+            self.editor.after_cancel(self._after_id)
+            self._after_id = None
+        self.generation += 1
+        self._jobs.put(None)
+
+    def _start_job(self):
+        self._after_id = None
+        if self._running:
+            return  # Started again once the running pass comes back
+        self._running = True
+        lines = self.editor.get("1.0", "end-1c").split("\n")
+        previous = (None, []) if self._full_pass else self.highlighter.previous_pass()
+        self._jobs.put((self.generation, lines, previous))
+        self.editor.after(self.poll_ms, self._poll)
+
+    def _worker(self):
+        while True:
+            job = self._jobs.get()
+            if job is None:
+                return
+            generation, lines, previous = job
+            try:
+                result = self.highlighter.relex(lines, previous)
+            except Exception as e:
+                print(f"Error in syntax highlighting: {e}")
+                result = None
+            self._results.put((generation, result))
+
+    def _poll(self):
+        try:
+            generation, result = self._results.get_nowait()
+        except queue.Empty:
+            self.editor.after(self.poll_ms, self._poll)
+            return
+
+        self._running = False
+        if generation != self.generation:
+            # The buffer changed while lexing, lex it again
+            self.dropped += 1
+            if self._after_id is None:
+                self._start_job()
+        elif result is not None:
+            self.highlighter.apply(result)
+            self._full_pass = False
+
+
+def benchmark(n_lines=5000, repeat=3):
+    """
+    Time a full highlight of a synthetic file: the old per-token loop (index, tag_add and
+    mark_set per token) against SyntaxHighlighter's batched tag_add. Needs a display.
+    """
+    import time
+    import tkinter as tk
+    from pygments import lex
+    from pygments.lexers import PythonLexer
+
+    block = [
+        "class Sample:",
+        '    """Docstring that',
+        '    spans two lines."""',
+        "    def method(self, value=10):",
+        "        # Comment about the value",
+        "        text = f'{value} items' if value else 'none'",
+        "        return [x * 2 for x in range(value)]",
+        "",
+    ]
+    code = "\n".join(block * (n_lines // len(block)))
+
+    root = tk.Tk()
+    root.withdraw()
+    editor = tk.Text(root)
+    editor.insert("1.0", code)
+    for tag in TAGS:
+        editor.tag_configure(tag)
+
+    def per_token():
+        text = editor.get("1.0", tk.END)
+        editor.mark_set("range_start", "1.0")
+        for tag in TAGS:
+            editor.tag_remove(tag, "1.0", tk.END)
+        lexer = PythonLexer()
+        highlighter = SyntaxHighlighter(editor, lexer)
+        for token, content in lex(text, lexer):
+            start = editor.index("range_start")
+            end = f"{start}+{len(content)}c"
+            editor.tag_add(highlighter.tag_for(token), start, end)
+            editor.mark_set("range_start", end)
+
+    def batched():
+        SyntaxHighlighter(editor).highlight_all()
+
+    def best(fn):
+        times = []
+        for _ in range(repeat):
+            began = time.perf_counter()
+            fn()
+            editor.update_idletasks()
+            times.append(time.perf_counter() - began)
+        return min(times)
+
+    old_time, new_time = best(per_token), best(batched)
+    tokens = len(SyntaxHighlighter(None).relex(code.split("\n")).spans)
+    print(f"{n_lines} lines, {tokens} tokens")
+    print(f"per-token tag_add: {old_time * 1000:.1f} ms (~{3 * tokens} Tcl calls)")
+    print(f"batched tag_add:   {new_time * 1000:.1f} ms ({2 * len(TAGS)} Tcl calls)")
+    print(f"speedup: {old_time / new_time:.1f}x")
+    root.destroy()
+
+
+if __name__ == "__main__":
+    benchmark()
@@ -1,22 +1,38 @@
+import sys
+from startup_profile import profiler
+if "--profile-startup" in sys.argv:
+    profiler.start()  # Time the imports below and the UI construction, report at the first window
+
 import tkinter as tk
 from tkinter import filedialog, scrolledtext
-import subprocess
-from pygments import lex
-from pygments.lexers import PythonLexer
-from pygments.token import Token
+import queue
+import re
+from collections import OrderedDict
 from tkinter.font import Font
 from tkinter import ttk  # Import ttk
+from syntax_highlighter import HighlightScheduler, SyntaxHighlighter
+from code_runner import CodeRunner
+from completion import CompletionIndex
+
+profiler.mark("imports")
 
 # IDE REGION
 
 class SimpleIDE:
+    runner = None  # CodeRunner shared by all IDE instances, its worker processes start with the first IDE
+
     def __init__(self, root, content_area, mode="light"):
         self.root = root  # root is now the Tk instance
         self.content_area = content_area  # Pass the content_area for frame swapping
         self.mode = mode
+        self.current_run = None
+        self.completions = CompletionIndex()  # Keywords, builtins and the buffer's identifiers
+        if SimpleIDE.runner is None:
+            SimpleIDE.runner = CodeRunner()
 
         self.frame = tk.Frame(content_area, bg="white")  # Create a frame for IDE
         self.frame.pack(fill=tk.BOTH, expand=True)
+        self.frame.bind("<Destroy>", self.on_destroy)
 
         # Editor
         self.editor = tk.Text(self.frame, wrap=tk.WORD, font=("Consolas", 12), undo=True, bg="white", fg="black")
@@ -61,6 +77,8 @@ class SimpleIDE:
 
         # Syntax Highlighting Tags
         self.setup_syntax_tags()
+        self.highlighter = SyntaxHighlighter(self.editor)  # Keeps the lexer and per-line state between passes
+        self.highlight_scheduler = HighlightScheduler(self.highlighter)  # Debounced, lexes on a worker thread
 
     def setup_syntax_tags(self):
         """Define syntax highlighting tags with appropriate fonts."""
@@ -77,43 +95,26 @@ class SimpleIDE:
             self.editor.tag_configure("Comment", foreground="orange", font=italic_font)
 
     def apply_syntax_highlighting(self, event=None):
-        """Apply syntax highlighting to the editor's content."""
-        text = self.editor.get("1.0", tk.END)
-        self.editor.mark_set("range_start", "1.0")
-        self.editor.mark_set("range_end", tk.END)
-        self.editor.tag_remove("Keyword", "1.0", tk.END)
-        self.editor.tag_remove("String", "1.0", tk.END)
-        self.editor.tag_remove("Comment", "1.0", tk.END)
-        self.editor.tag_remove("Default", "1.0", tk.END)
-
-        for token, content in lex(text, PythonLexer()):
-            start = self.editor.index("range_start")
-            end = f"{start}+{len(content)}c"
-            if token in Token.Keyword:
-                self.editor.tag_add("Keyword", start, end)
-            elif token in Token.Literal.String:
-                self.editor.tag_add("String", start, end)
-            elif token in Token.Comment:
-                self.editor.tag_add("Comment", start, end)
-            else:
-                self.editor.tag_add("Default", start, end)
-            self.editor.mark_set("range_start", end)
+        """Apply syntax highlighting to the editor's whole content."""
+        self.highlight_scheduler.highlight_all()
 
     def auto_complete(self, event):
-        """Handle basic auto-completion for Python keywords."""
-        current_line = self.editor.get("insert linestart", "insert lineend")
-        cursor_index = self.editor.index("insert").split(".")[-1]
-        prefix = current_line[:int(cursor_index)]
-        suggestions = [kw for kw in self.keywords if kw.startswith(prefix)]
-
+        """Complete the identifier before the cursor with its most frequent match."""
+        before_cursor = self.editor.get("insert linestart", "insert")
+        match = re.search(r"[A-Za-z_][A-Za-z0-9_]*$", before_cursor)
+        if not match:
+            return None  # Nothing to complete, let Tab indent
+
+        prefix = match.group()
+        self.completions.update_lines(self.editor.get("1.0", "end-1c").split("\n"))
+        suggestions = self.completions.complete(prefix, 1)
         if suggestions:
-            self.editor.delete("insert linestart", "insert")
-            self.editor.insert("insert", suggestions[0])
+            self.editor.insert("insert", suggestions[0][len(prefix):])
         return "break"  # Prevent the tab key's default action
 
     def on_key_release(self, event):
-        """Trigger syntax highlighting on key release."""
-        self.apply_syntax_highlighting()
+        """Re-highlight the changed lines once typing pauses."""
+        self.highlight_scheduler.schedule()
 
     def open_file(self):
         file_path = filedialog.askopenfilename(filetypes=[("Python Files", "*.py"), ("All Files", "*.*")])
@@ -131,19 +132,115 @@ class SimpleIDE:
                 file.write(self.editor.get("1.0", tk.END))
 
     def run_code(self):
+        """Run the editor's code in a worker process, output is streamed in by poll_run."""
         code = self.editor.get("1.0", tk.END)
         self.output.config(state=tk.NORMAL)
         self.output.delete("1.0", tk.END)
+        self.output.config(state=tk.DISABLED)
+
+        if self.current_run is not None:
+            self.current_run.cancel()  # Run again: stop the previous run
         try:
-            result = subprocess.run(["python", "-c", code], capture_output=True, text=True)
-            self.output.insert(tk.END, result.stdout)
-            self.output.insert(tk.END, result.stderr)
+            self.current_run = SimpleIDE.runner.start(code)
         except Exception as e:
-            self.output.insert(tk.END, str(e))
+            self.current_run = None
+            self.append_output(str(e))
+            return
+        self.root.after(20, self.poll_run, self.current_run)
+
+    def poll_run(self, run):
+        """Move the output produced so far into the output box, until the run is done."""
+        if run is not self.current_run:
+            return  # Replaced by a newer run
+
+        chunks = []
+        result = None
+        while result is None:
+            try:
+                name, value = run.events.get_nowait()
+            except queue.Empty:
+                break
+            if name == "done":
+                result = value
+            else:
+                chunks.append(value)
+        if chunks:
+            self.append_output("".join(chunks))
+
+        if result is None:
+            self.root.after(20, self.poll_run, run)
+            return
+        if result.timed_out:
+            self.append_output(f"\n[Stopped: time limit of {run.timeout}s reached]\n")
+        self.current_run = None
+
+    def on_destroy(self, event):
+        """Stop the highlight worker and any running code when the IDE's frame goes away."""
+        if event.widget is not self.frame:
+            return
+        self.highlight_scheduler.stop()
+        if self.current_run is not None:
+            self.current_run.cancel()
+            self.current_run = None
+
+    def append_output(self, text):
+        self.output.config(state=tk.NORMAL)
+        self.output.insert(tk.END, text)
+        self.output.see(tk.END)
         self.output.config(state=tk.DISABLED)
 
 # GENERAL UI REGION
 
+class ViewManager:
+    """
+    Shows one section at a time in `container`.
+    - A section is built by its builder on the first visit and cached afterwards,
+      so switching back to it only re-packs the existing frame.
+    - With `max_cached` set, the least recently shown hidden sections are destroyed
+      once more than that many are built, evict() / evict_hidden() free them on demand.
+    - Sections named in `keep` are never evicted, e.g. one holding unsaved work.
+    """
+
+    def __init__(self, container, max_cached=None, keep=()):
+        self.container = container
+        self.max_cached = max_cached
+        self.keep = set(keep)
+        self.builders = {}  # Section name -> function(parent) returning its frame
+        self.views = OrderedDict()  # Built frames, least recently shown first
+        self.current = None
+
+    def register(self, name, builder):
+        self.builders[name] = builder
+
+    def show(self, name):
+        if name == self.current:
+            return
+        if self.current is not None:
+            self.views[self.current].pack_forget()
+
+        view = self.views.get(name)
+        if view is None:
+            view = self.builders[name](self.container)
+            self.views[name] = view
+        self.views.move_to_end(name)
+        view.pack(fill=tk.BOTH, expand=True)
+        self.current = name
+
+        if self.max_cached:
+            hidden = [n for n in self.views if n != name and n not in self.keep]
+            for old in hidden[:max(0, len(self.views) - self.max_cached)]:
+                self.evict(old)
+
+    def evict(self, name):
+        """Destroy a hidden section, it is rebuilt on its next visit."""
+        if name == self.current or name in self.keep or name not in self.views:
+            return
+        self.views.pop(name).destroy()
+
+    def evict_hidden(self):
+        for name in list(self.views):
+            self.evict(name)
+
 def create_ui():
     root = tk.Tk()
     root.title("")
@@ -168,6 +265,7 @@ def create_ui():
     root.geometry(f'{window_width}x{window_height}+{position_left}+{position_top}')
     
     root.configure(bg="#f4f4f4")
+    profiler.mark("window and styles")
 
     # Sidebar
     sidebar = tk.Frame(root, width=500, bg="white", relief="raised", bd=0)
@@ -191,48 +289,43 @@ def create_ui():
     button_frame = ttk.Frame(sidebar,)
     button_frame.pack(side="top", pady=7, padx=10, fill="x")
 
-    # Function for switching between frames
-    def show_frame(frame):
-
-        for widget in content_area.winfo_children():
-            widget.pack_forget()
-        frame.pack(fill=tk.BOTH, expand=True)
-
-        if str(frame) == ".!frame2.!frame":
-            SimpleIDE(root, content_area)
-
-    # Button to switch frames
-    button_ide = ttk.Button(button_frame, text="Examination", style="TButton", command=lambda: show_frame(ide_frame))
+    # Button to switch sections
+    button_ide = ttk.Button(button_frame, text="Examination", style="TButton", command=lambda: views.show("Examination"))
     button_ide.pack(pady=12,fill=tk.X)
 
-    button_exam = ttk.Button(button_frame, text="Evaluation", style="TButton", command=lambda: show_frame(eval_frame))
+    button_exam = ttk.Button(button_frame, text="Evaluation", style="TButton", command=lambda: views.show("Evaluation"))
     button_exam.pack(pady=12,fill=tk.X)
 
-    button_eval = ttk.Button(button_frame, text="Feedback", style="TButton", command=lambda: show_frame(feed_frame))
+    button_eval = ttk.Button(button_frame, text="Feedback", style="TButton", command=lambda: views.show("Feedback"))
     button_eval.pack(pady=12,fill=tk.X)
+    profiler.mark("sidebar")
 
     # Frame container for main content
     content_area = tk.Frame(root, bg="white")
     content_area.pack(side=tk.TOP, fill=tk.BOTH, expand=True)
 
-    # Frame for IDE
-    ide_frame = tk.Frame(content_area, bg="white")
-    ide_frame.pack(fill=tk.X, pady=2)
-
-    # Frame for Examination
-    exam_frame = tk.Frame(content_area, bg="white")
-    exam_label = tk.Label(exam_frame, text="This is the Examination Frame", font=("Arial", 18))
-    exam_label.pack()
-
-    # Frame for Examination
-    eval_frame = tk.Frame(content_area, bg="white")
-    eval_label = tk.Label(eval_frame, text="This is the Evaluation Frame", font=("Arial", 18))
-    eval_label.pack()
-
-    # Frame for Evaluation
-    feed_frame = tk.Frame(content_area, bg="white")
-    feed_label = tk.Label(feed_frame, text="This is the Feedback Frame", font=("Arial", 18))
-    feed_label.pack()
+    # Placeholder sections, built the first time they are shown
+    def label_view(text):
+        def build(parent):
+            frame = tk.Frame(parent, bg="white")
+            tk.Label(frame, text=text, font=("Arial", 18)).pack()
+            return frame
+        return build
+
+    # Sections are built on first visit, at most two stay built. The IDE keeps the
+    # user's code and its highlighter thread, so it is never destroyed
+    views = ViewManager(content_area, max_cached=2, keep=("Examination",))
+    views.register("Examination", lambda parent: SimpleIDE(root, parent).frame)
+    views.register("Evaluation", label_view("This is the Evaluation Frame"))
+    views.register("Feedback", label_view("This is the Feedback Frame"))
+    profiler.mark("content area")
+
+    if profiler.enabled:
+        # Report once the main window is on screen, then quit
+        def on_map(event):
+            if event.widget is root:
+                root.after_idle(lambda: (profiler.first_window(), root.destroy()))
+        root.bind("<Map>", on_map, add="+")
 
     root.mainloop()
 
@@ -1,12 +1,16 @@
+import sys
+from startup_profile import profiler
+if "--profile-startup" in sys.argv:
+    profiler.start()  # Time the imports below and the UI construction, report at the first window
+
 import tkinter as tk
 from tkinter import filedialog, scrolledtext
 import subprocess
-from pygments import lex
-from pygments.lexers import PythonLexer
-from pygments.token import Token
 from tkinter.font import Font
 from tkinter import ttk  # Import ttk
 
+profiler.mark("imports")
+
 # IDE REGION
 
 class SimpleIDE:
@@ -78,6 +82,11 @@ class SimpleIDE:
 
     def apply_syntax_highlighting(self, event=None):
         """Apply syntax highlighting to the editor's content."""
+        # Pygments is imported on first use, it is one of the slowest imports at startup
+        from pygments import lex
+        from pygments.lexers import PythonLexer
+        from pygments.token import Token
+
         text = self.editor.get("1.0", tk.END)
         self.editor.mark_set("range_start", "1.0")
         self.editor.mark_set("range_end", tk.END)
@@ -174,6 +183,7 @@ def create_ui():
     root.geometry(f'{window_width}x{window_height}+{position_left}+{position_top}')
     
     root.configure(bg="#FF0000")
+    profiler.mark("window and styles")
 
     # Sidebar
     sidebar = tk.Frame(root, width=100, bg="white", relief="raised", bd=0)
@@ -191,7 +201,8 @@ def create_ui():
     # Using ttk.Button for styled buttons
     ttk.Button(sidebar, text="Edit", style="TButton").pack(pady=(10, 10))
 
-    import ttkbootstrap as ttkb
+    profiler.mark("sidebar")
+    import ttkbootstrap as ttkb  # Only needed from here on
 
     # Style configuration for the buttons
     style = ttkb.Style()
@@ -301,6 +312,15 @@ def create_ui():
 
     # ide = SimpleIDE(root)  # Pass root, not content_area
 
+    profiler.mark("section buttons and IDE")
+
+    if profiler.enabled:
+        # Report once the main window is on screen, then quit
+        def on_map(event):
+            if event.widget is root:
+                root.after_idle(lambda: (profiler.first_window(), root.destroy()))
+        root.bind("<Map>", on_map, add="+")
+
     root.mainloop()
 
 create_ui()
\ No newline at end of file
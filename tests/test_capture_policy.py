@@ -0,0 +1,76 @@
+import numpy as np
+import pandas as pd
+import pytest
+from capture_policy import make_move_policy
+from data_label import fill_missing_intervals, label_events
+from event_store import EventStore, events_to_dataframe
+
+
+def synthetic_moves(seed=0, strokes=300):
+    """Strokes at 125 Hz with jitter, slow drags at ~8 Hz and pauses between them."""
+    rng = np.random.default_rng(seed)
+    t, x, y = 0.0, 500.0, 500.0
+    moves = []
+    for _ in range(strokes):
+        step = rng.choice([0.008, 0.125]) if rng.random() < 0.2 else 0.008
+        heading = rng.uniform(0, 2 * np.pi)
+        for _ in range(rng.integers(5, 120)):
+            t += step * rng.uniform(0.7, 1.3)
+            heading += rng.normal(0, 0.15)
+            x += 6 * np.cos(heading) + rng.normal(0, 0.5)
+            y += 6 * np.sin(heading) + rng.normal(0, 0.5)
+            moves.append((t, int(x), int(y)))
+        t += rng.choice([0.05, 0.3, 1.5, 4.0])
+    return moves
+
+
+def captured(moves, policy, **options):
+    store = EventStore('mouse_move')
+    move_filter = make_move_policy(policy, store, **options)
+    for move in moves:
+        move_filter.add(*move)
+    move_filter.flush()
+    stats = move_filter.stats()
+    assert stats['seen'] == stats['kept'] + stats['dropped'] == len(moves)
+    return events_to_dataframe(store)
+
+
+def label_shares(events):
+    """Share of the session's move time under each behavior label, each move weighted by its interval."""
+    labeled = label_events(fill_missing_intervals(events, {}))
+    return labeled.groupby('Behavior_Label')['interval'].sum() / labeled['interval'].sum()
+
+
+@pytest.mark.parametrize('policy, options', [
+    ('time', {'min_interval_ms': 50}),
+    ('distance', {'min_distance_px': 20}),
+    ('simplify', {'tolerance_px': 3}),
+])
+def test_labels_match_storing_every_move(policy, options):
+    moves = synthetic_moves()
+    reference = label_shares(captured(moves, 'all'))
+    events = captured(moves, policy, **options)
+    assert len(events) < len(moves) / 2
+    pd.testing.assert_series_equal(label_shares(events), reference, rtol=1e-9)
+    assert reference['Active'] > 0.2
+
+
+def test_relaxed_gaps_keep_inactive_and_moving_time():
+    moves = synthetic_moves()
+    reference = label_shares(captured(moves, 'all'))
+    events = captured(moves, 'time', min_interval_ms=200, max_gap=1.0, stroke_pause=1.0)
+    assert len(events) * 10 <= len(moves)
+    shares = label_shares(events)
+    assert shares['Inactive'] == pytest.approx(reference['Inactive'], rel=1e-9)
+    assert shares['Active'] + shares['Moderately Active'] == pytest.approx(
+        reference['Active'] + reference['Moderately Active'], rel=1e-9)
+
+
+def test_gaps_above_the_inactive_threshold_are_rejected():
+    with pytest.raises(ValueError):
+        make_move_policy('simplify', EventStore('mouse_move'), max_gap=1.5)
+
+
+def test_time_interval_at_the_active_threshold_is_rejected():
+    with pytest.raises(ValueError):
+        make_move_policy('time', EventStore('mouse_move'), min_interval_ms=100)
@@ -0,0 +1,35 @@
+import pytest
+from code_runner import CodeRunner
+
+
+@pytest.fixture
+def runner():
+    runner = CodeRunner(pool_size=1, max_output_bytes=1000)
+    yield runner
+    runner.shutdown()
+
+
+def output_bytes(result):
+    return len(result.stdout.encode("utf-8")) + len(result.stderr.encode("utf-8"))
+
+
+def test_output_is_cut_at_the_byte_limit(runner):
+    run = runner.start("import sys\nfor _ in range(500):\n    sys.stdout.write('x' * 37)\n")
+    result = run.wait()
+    assert result.returncode == 0
+    assert output_bytes(result) == 1000
+    assert run.truncated
+
+
+def test_limit_counts_encoded_bytes(runner):
+    # 3 bytes per character: the cap falls inside a character, which is left out whole
+    result = runner.run("print('€' * 2000)")
+    assert result.stdout == '€' * len(result.stdout)
+    assert len(result.stdout) == 333
+
+
+def test_output_under_the_limit_is_complete(runner):
+    run = runner.start("print('é' * 10)")
+    result = run.wait()
+    assert result.stdout == 'é' * 10 + '\n'
+    assert not run.truncated
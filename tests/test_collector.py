@@ -0,0 +1,36 @@
+import os
+import pandas as pd
+from data_collection import Collector
+from replay_source import ReplaySource
+
+
+def replay(tmp_path, source, **settings):
+    collector = Collector(source, session_directory=str(tmp_path / "session"),
+                          output_path=str(tmp_path / "session.csv"), move_policy='all', move_policy_options={},
+                          publish_metrics=False, **settings)
+    collector.start()
+    source.wait()
+    return collector, collector.stop()
+
+
+def test_streamed_summary_matches_segments(tmp_path):
+    # Fast replay: most events are still queued or unflushed when stop() is called
+    source = ReplaySource.synthetic(3000, rate=20000, seed=1)
+    collector, saved_to = replay(tmp_path, source, stream_to_disk=True, output_format='csv')
+
+    summary = pd.read_csv(collector.summary_path).set_index('Metric')['Value']
+    events = pd.concat([pd.read_csv(path) for path in collector.session_writer.segments], ignore_index=True)
+    keys = events[events['event_type'] == 'keystroke']
+    clicks = events[events['event_type'] == 'mouse_click']
+    assert len(events) == source.sent == 3000
+    assert int(summary['Total Keystrokes']) == len(keys)
+    assert abs(float(summary['Avg. Keypress Interval']) - keys['interval'].mean()) < 1e-9
+    assert abs(float(summary['Avg. Mouse Click Interval']) - clicks['interval'].mean()) < 1e-9
+    assert abs(float(summary['Typing Speed (KPM)']) - len(keys) / collector.duration() * 60) < 1e-6
+    assert saved_to == str(tmp_path / "session")
+
+
+def test_unstarted_collector_writes_nothing(tmp_path):
+    Collector(ReplaySource([], rate=1), session_directory=str(tmp_path / "session"), stream_to_disk=True,
+              output_format='csv', publish_metrics=False)
+    assert not os.path.exists(tmp_path / "session")
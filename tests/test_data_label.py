@@ -0,0 +1,98 @@
+import os
+import shutil
+import pandas as pd
+import pytest
+from data_label import fill_missing_intervals, label_batch, label_events, label_events_rowwise, label_file, label_thresholds
+from session_format import load_events
+
+FIXTURE_LOG = os.path.join(os.path.dirname(__file__), "fixtures", "activity_log.csv")
+
+
+def plain_labels(labeled):
+    # Newer pandas infers a string dtype (missing = NaN) for the row-wise label columns
+    labels = labeled[['Typing_Label', 'Behavior_Label']].astype(object)
+    return labeled.assign(**labels.where(labels.notna(), None))
+
+
+def assert_same_labels(data):
+    pd.testing.assert_frame_equal(plain_labels(label_events(data)), plain_labels(label_events_rowwise(data)))
+
+
+def test_vectorized_labels_match_rowwise():
+    # The fixture has intervals exactly at each threshold, missing intervals and every event type
+    data = load_events(FIXTURE_LOG)
+    assert_same_labels(data)
+
+    filled = fill_missing_intervals(data, {})
+    assert_same_labels(filled)
+    assert set(label_events(filled)['Behavior_Label'].dropna()) == {
+        'Active', 'Moderately Active', 'Inactive', 'Clicked'}
+
+
+def test_partial_thresholds_fall_back_to_the_defaults():
+    data = load_events(FIXTURE_LOG)
+    labeled = label_events(data, {'keystroke_high': 0.2})
+    keys = data['event_type'] == 'keystroke'
+    high = keys & (data['interval'] < 0.2)
+    medium = keys & (data['interval'] >= 0.2) & (data['interval'] < label_thresholds['keystroke_medium'])
+    assert (labeled.loc[high, 'Typing_Label'] == 'High Speed').all()
+    assert (labeled.loc[medium, 'Typing_Label'] == 'Medium Speed').all()
+    assert labeled.loc[data['event_type'] == 'mouse_move', 'Behavior_Label'].notna().all()
+
+
+def write_streamed_session(directory, data):
+    # Two segments and a summary, like SessionWriter leaves them
+    os.makedirs(directory)
+    half = len(data) // 2
+    data.iloc[:half].to_csv(os.path.join(directory, "events_00000.csv"), index=False)
+    data.iloc[half:].to_csv(os.path.join(directory, "events_00001.csv"), index=False)
+    pd.DataFrame({'Metric': ['Total Keystrokes'], 'Value': [1]}).to_csv(os.path.join(directory, "summary.csv"), index=False)
+
+
+def test_batch_labels_a_streamed_session_as_one_log(tmp_path):
+    data = load_events(FIXTURE_LOG).sort_values('timestamp', ignore_index=True)
+    write_streamed_session(tmp_path / "session", data)
+    shutil.copy(FIXTURE_LOG, tmp_path / "log.csv")
+
+    summary = label_batch(str(tmp_path), workers=1, fill_intervals=True)
+    assert summary['sessions'] == 2 and not summary['failed']
+    assert sorted(os.listdir(tmp_path)) == ['log.csv', 'log_labeled.csv', 'session', 'session_labeled.csv']
+    labeled = pd.read_csv(tmp_path / "session_labeled.csv")
+    expected = label_events(fill_missing_intervals(data, {}))
+    assert len(labeled) == len(data)
+    assert labeled['Behavior_Label'].fillna('').tolist() == expected['Behavior_Label'].fillna('').tolist()
+
+    # The same session through a glob over its segments
+    (tmp_path / "session_labeled.csv").unlink()
+    summary = label_batch(str(tmp_path / "session" / "*.csv"), workers=1, chunksize=7)
+    assert summary['sessions'] == 1
+    assert len(pd.read_csv(tmp_path / "session_labeled.csv")) == len(data)
+
+
+def test_batch_retries_failed_sessions_only_after_they_change(tmp_path):
+    shutil.copy(FIXTURE_LOG, tmp_path / "good.csv")
+    broken = tmp_path / "broken.csv"
+    broken.write_text("not,an,event,log\n1,2,3,4\n")
+
+    summary = label_batch(str(tmp_path), workers=1)
+    assert summary['sessions'] == 1 and summary['failed'] == [str(broken)]
+
+    summary = label_batch(str(tmp_path), workers=1)
+    assert summary['sessions'] == 0 and summary['failed_before'] == 1 and summary['skipped'] == 1
+
+    shutil.copy(FIXTURE_LOG, broken)
+    summary = label_batch(str(tmp_path), workers=1)
+    assert summary['sessions'] == 1 and summary['failed_before'] == 0 and not summary['failed']
+
+
+def test_chunked_parquet_labels_match_whole_file(tmp_path):
+    pytest.importorskip("pyarrow")
+    from session_format import write_session
+    data = load_events(FIXTURE_LOG)
+    # Moves first: the first chunks have no null x/y, the later ones do
+    data = pd.concat([data[data['event_type'] == 'mouse_move'], data[data['event_type'] != 'mouse_move']])
+    write_session(str(tmp_path / "session.parquet"), data)
+
+    label_file(str(tmp_path / "session.parquet"), str(tmp_path / "whole.csv"))
+    label_file(str(tmp_path / "session.parquet"), str(tmp_path / "chunked.csv"), chunksize=5)
+    assert (tmp_path / "whole.csv").read_bytes() == (tmp_path / "chunked.csv").read_bytes()
@@ -0,0 +1,35 @@
+import json
+from grader import Grader
+
+TESTS = [
+    {"name": "reverse", "code": "assert reverse('ab') == 'ba'"},
+    {"name": "output", "code": "print(reverse('abc'))", "expected_output": "cba"},
+]
+
+
+def grade(submissions, tests=TESTS, **options):
+    rows, stats = Grader(tests, workers=2, **options).grade(submissions)
+    return {row["submission"]: row for row in rows}, stats
+
+
+def test_early_exit_fails_every_test(tmp_path):
+    rows, _ = grade({
+        "good": "def reverse(s):\n    return s[::-1]\n",
+        "exits": "import sys\nsys.exit(0)\n",
+        "os_exit": "import os\nos._exit(0)\n",
+    }, cache_path="")
+    assert rows["good"]["passed"] == 2
+    assert rows["exits"]["passed"] == 0
+    assert rows["os_exit"]["passed"] == 0
+
+
+def test_timeouts_are_not_cached(tmp_path):
+    cache_path = str(tmp_path / "cache.json")
+    submissions = {"slow": "import time\ntime.sleep(5)\ndef reverse(s):\n    return s[::-1]\n"}
+    rows, stats = grade(submissions, TESTS[:1], timeout=0.5, cache_path=cache_path)
+    assert rows["slow"]["reverse"] == "timeout"
+    with open(cache_path) as file:
+        assert json.load(file) == {}
+
+    _, stats = grade(submissions, TESTS[:1], timeout=0.5, cache_path=cache_path)
+    assert stats["runs"] == 1 and stats["cached"] == 0
@@ -0,0 +1,35 @@
+import numpy as np
+from live_metrics import MetricsEngine, RunningStats
+
+
+def test_idle_counts_only_the_part_of_a_gap_inside_the_window():
+    engine = MetricsEngine(windows=(10, 60), start=0)
+    engine.activity(1)
+    for timestamp in range(51, 61):  # 50 s gap ending at t=51, then activity every second
+        engine.activity(timestamp)
+    snapshot = engine.snapshot(60)
+    assert snapshot['10s']['idle_seconds'] == 1.0
+    assert snapshot['60s']['idle_seconds'] == 50.0
+    assert snapshot['session']['idle_seconds'] == 50.0
+
+
+def test_ongoing_gap_is_clipped_to_the_window():
+    engine = MetricsEngine(windows=(10,), start=4)
+    engine.activity(5)
+    assert engine.snapshot(12)['10s']['idle_seconds'] == 7.0
+    assert engine.snapshot(40)['10s']['idle_seconds'] == 10.0
+    assert engine.snapshot(40)['session']['idle_seconds'] == 35.0
+
+
+def test_variance_of_large_values_with_small_spread():
+    rng = np.random.default_rng(0)
+    values = 1e4 + rng.random(2000) * 0.01
+    stats = RunningStats(seconds=5)
+    for number, value in enumerate(values):
+        timestamp = number * 0.01
+        stats.add(timestamp, value)
+        stats.expire(timestamp)
+    window = values[-stats.count:]
+    assert 490 < stats.count < 510
+    assert np.isclose(stats.variance(), np.var(window, ddof=1), rtol=1e-6)
+    assert np.isclose(stats.mean(), window.mean(), rtol=1e-12)
@@ -0,0 +1,67 @@
+import http.client
+import json
+import threading
+from live_metrics import MetricsEngine
+from metrics_server import MetricsPublisher
+
+
+def test_stop_reaches_a_client_whose_queue_is_full():
+    publisher = MetricsPublisher(MetricsEngine(), port=0, max_queued=4)
+    client = publisher.connect()
+    for number in range(4):
+        client.messages.put_nowait(f"message {number}")
+    publisher.stop()
+    queued = [client.messages.get_nowait() for _ in range(client.messages.qsize())]
+    assert queued == ["message 1", "message 2", "message 3", None]
+
+
+def test_stop_ends_open_event_streams():
+    publisher = MetricsPublisher(MetricsEngine(), port=0, interval_ms=20, max_queued=2)
+    publisher.start()
+    connection = http.client.HTTPConnection("127.0.0.1", publisher.port, timeout=5)
+    connection.request("GET", "/events")
+    response = connection.getresponse()
+    assert response.getheader("Content-Type") == "text/event-stream"
+    first = response.readline()
+    assert first.startswith(b"data: ")
+
+    ended = threading.Event()
+
+    def read_to_end():
+        response.read()  # Returns once the server ends the stream
+        ended.set()
+
+    threading.Thread(target=read_to_end, daemon=True).start()
+    publisher.stop()
+    assert ended.wait(3)
+    connection.close()
+
+
+def test_concurrent_publishes_keep_sequence_numbers_unique():
+    engine = MetricsEngine(start=0)
+    publisher = MetricsPublisher(engine, port=0, max_queued=10000)
+    client = publisher.connect()
+    client.needs_snapshot = False
+
+    def publish_many(offset):
+        for number in range(300):
+            engine.keystroke(1000 + offset + number, 0.1)  # A new second every time, always a delta
+            publisher.publish()
+
+    threads = [threading.Thread(target=publish_many, args=(offset,)) for offset in (0, 1000)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    publisher.stop()
+
+    messages = []
+    while True:
+        message = client.messages.get_nowait()
+        if message is None:
+            break
+        messages.append(json.loads(message))
+    sequences = [message['seq'] for message in messages]
+    assert len(sequences) == len(set(sequences)) == publisher.sequence
+    seconds = [second for message in messages for second in message.get('histogram', {})]
+    assert len(seconds) == len(set(seconds))
@@ -0,0 +1,25 @@
+from question_bank import QuestionBank
+
+SAMPLE = [
+    {"question": "What is Python?", "type": "multiple choice", "choices": ["A language", "An animal"],
+     "correct_answer": "A language"},
+    {"question": "Write a function to reverse a string.", "type": "coding"},
+]
+
+
+def test_sync_reimports_only_when_the_list_changes(tmp_path):
+    path = str(tmp_path / "questions.db")
+    bank = QuestionBank(path)
+    assert bank.sync_deck("default", SAMPLE)
+    assert not bank.sync_deck("default", SAMPLE)
+    bank.close()
+
+    # Next run with an edited list
+    edited = SAMPLE + [{"question": "What is a tuple?", "type": "coding"}]
+    bank = QuestionBank(path)
+    assert bank.sync_deck("default", edited)
+    deck = bank.deck("default")
+    assert len(deck) == 3
+    assert deck[2]["question"] == "What is a tuple?"
+    assert not bank.sync_deck("default", edited)
+    bank.close()
@@ -0,0 +1,73 @@
+import os
+import time
+import pandas as pd
+import pytest
+from event_store import EventStore, SymbolTable
+from session_writer import SessionWriter
+
+
+def make_stores():
+    symbols = SymbolTable()
+    return [EventStore(event_type, symbols=symbols) for event_type in ('keystroke', 'mouse_move', 'mouse_click')]
+
+
+def read_segments(writer):
+    return pd.concat([pd.read_csv(path) for path in writer.segments], ignore_index=True)
+
+
+def test_summary_counts_every_flushed_event(tmp_path):
+    keystrokes, mouse_moves, mouse_clicks = stores = make_stores()
+    # Large batches and a long interval: everything is still pending when the session ends
+    writer = SessionWriter(stores, str(tmp_path / "session"), batch_size=10**6, flush_interval_ms=60000)
+    writer.start()
+    for i in range(838):
+        keystrokes.append(float(i), key='a', interval=0.25 + (i % 3) * 0.1)
+        mouse_moves.append(float(i), x=i, y=i)
+    for i in range(17):
+        mouse_clicks.append(float(i), x=1, y=1, button='Button.left', interval=2.0)
+
+    summary_path = writer.finalize(lambda: {
+        'Total Keystrokes': writer.event_counts['keystroke'],
+        'Avg. Keypress Interval': writer.mean_interval('keystroke'),
+        'Avg. Mouse Click Interval': writer.mean_interval('mouse_click'),
+    })
+
+    summary = pd.read_csv(summary_path).set_index('Metric')['Value'].astype(float)
+    events = read_segments(writer)
+    keys = events[events['event_type'] == 'keystroke']
+    clicks = events[events['event_type'] == 'mouse_click']
+    assert summary['Total Keystrokes'] == len(keys) == 838
+    assert abs(summary['Avg. Keypress Interval'] - keys['interval'].mean()) < 1e-9
+    assert abs(summary['Avg. Mouse Click Interval'] - clicks['interval'].mean()) < 1e-9
+    assert writer.rows_written == len(events) == 838 * 2 + 17
+
+
+def test_finalize_accepts_metrics_computed_after_stop(tmp_path):
+    keystrokes = make_stores()[0]
+    writer = SessionWriter([keystrokes], str(tmp_path / "session"), flush_interval_ms=60000)
+    writer.start()
+    for i in range(5):
+        keystrokes.append(float(i), key='a', interval=1.0)
+    writer.stop()
+    summary_path = writer.finalize({'Total Keystrokes': writer.event_counts['keystroke']})
+
+    summary = pd.read_csv(summary_path).set_index('Metric')['Value']
+    assert int(summary['Total Keystrokes']) == len(read_segments(writer)) == 5
+    assert os.path.basename(summary_path) == "summary.csv"
+
+
+def test_parquet_segments_rotate_quickly_and_stay_readable(tmp_path):
+    pytest.importorskip("pyarrow")
+    keystrokes = make_stores()[0]
+    writer = SessionWriter([keystrokes], str(tmp_path / "session"), flush_interval_ms=20, segment_format='parquet',
+                           max_segment_seconds=0.2)
+    assert SessionWriter([keystrokes], str(tmp_path / "other"), segment_format='parquet').max_segment_seconds == 10
+    writer.start()
+    for i in range(5):
+        keystrokes.append(float(i), key='a', interval=1.0)
+    time.sleep(0.5)  # Idle past the segment age: the segment is closed without new events
+
+    # Without stopping the writer (as after a crash) the events are already readable
+    assert len(writer.segments) == 1 and writer._segment_file is None
+    assert len(pd.read_parquet(writer.segments[0])) == 5
+    writer.stop()
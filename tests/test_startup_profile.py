@@ -0,0 +1,30 @@
+import sys
+from startup_profile import StartupProfiler
+
+
+def profile(source, forget=()):
+    for module in forget:
+        sys.modules.pop(module, None)
+    profiler = StartupProfiler()
+    profiler.start()
+    try:
+        exec(source, {})
+    finally:
+        profiler.stop()
+    return {name: depth for name, _, _, depth in profiler.imports}
+
+
+def test_from_import_of_a_submodule_is_recorded():
+    import json  # noqa: F401 - the package is loaded, only the submodule is new
+    imports = profile("from json import tool", forget=["json.tool"])
+    assert imports.get("json.tool") == 0
+
+
+def test_package_and_submodule_loaded_together():
+    imports = profile("from xml import dom", forget=[m for m in list(sys.modules) if m == "xml" or m.startswith("xml.")])
+    assert imports.get("xml, xml.dom") == 0
+
+
+def test_failed_and_attribute_imports_are_not_recorded():
+    imports = profile("try:\n    import _no_such_module_\nexcept ImportError:\n    pass\nfrom os import path, sep")
+    assert imports == {}
@@ -0,0 +1,81 @@
+import time
+import pytest
+from syntax_highlighter import HighlightScheduler, SyntaxHighlighter
+
+pytest.importorskip("pygments")
+
+
+class FakeEditor:
+    """Just enough of tk.Text for the highlighter, after() callbacks run when pump() is called."""
+
+    def __init__(self, text):
+        self.text = text
+        self.callbacks = {}
+        self.next_id = 0
+        self.tagged = 0
+
+    def get(self, start, end):
+        return self.text
+
+    def after(self, ms, callback):
+        self.next_id += 1
+        self.callbacks[self.next_id] = callback
+        return self.next_id
+
+    def after_cancel(self, after_id):
+        self.callbacks.pop(after_id, None)
+
+    def tag_remove(self, tag, start, end):
+        pass
+
+    def tag_add(self, tag, *indices):
+        self.tagged += 1
+
+    def pump(self, timeout=5):
+        deadline = time.monotonic() + timeout
+        while self.callbacks and time.monotonic() < deadline:
+            after_id = min(self.callbacks)
+            self.callbacks.pop(after_id)()
+            time.sleep(0.001)
+
+
+CODE = 'def f(x):\n    """Doc\n    string"""\n    return x + 1\n' * 50
+
+
+def test_relex_uses_the_given_previous_pass():
+    highlighter = SyntaxHighlighter(None)
+    lines = CODE.split("\n")
+    full = highlighter.relex(lines, (None, []))
+    edited = list(lines)
+    edited[7] = "    return x + 2"
+    # What the highlighter holds (here a reset by highlight_all()) must not matter
+    highlighter.lines, highlighter.line_states = None, []
+    result = highlighter.relex(edited, (full.lines, full.states))
+    assert result.start <= 7 and result.stop == 8  # Only the edited function is re-lexed
+    assert result.states[:result.start] == full.states[:result.start]
+
+
+def test_highlight_all_runs_on_the_worker():
+    editor = FakeEditor(CODE)
+    highlighter = SyntaxHighlighter(editor)
+    scheduler = HighlightScheduler(highlighter)
+    try:
+        scheduler.highlight_all()
+        assert highlighter.lines is None  # Nothing lexed or applied on the calling thread
+        editor.pump()
+        assert highlighter.lines == CODE.split("\n")
+        assert editor.tagged
+
+        # A full pass requested while an edit is being lexed replaces it
+        editor.text = CODE + "x = 1\n"
+        scheduler.schedule()
+        editor.pump()
+        editor.text = CODE
+        scheduler.highlight_all()
+        scheduler.highlight_all()
+        editor.pump()
+        assert highlighter.lines == CODE.split("\n")
+        assert highlighter.line_states[0] == ("root",)
+        assert not scheduler._full_pass
+    finally:
+        scheduler.stop()